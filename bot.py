@@ -1,10 +1,11 @@
 from datetime import datetime
 import psutil
 import platform
-import smtplib
+import aiosmtplib
 import openai
 import os
 from email.message import EmailMessage
+import email.utils
 from fpdf import FPDF
 from pathlib import Path
 from discord.ui import View, Button, Select
@@ -14,45 +15,9 @@ import re
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
 
-def generate_dynamic_pdf(job_title):
-    try:
-        with open("anschreiben_vorlage.txt", "r", encoding="utf-8") as f:
-            text = f.read()
-            text = text.replace("{{job_title}}", job_title)
-            text = text.replace("{{sender_name}}", os.getenv("SENDER_NAME", "Max Mustermann"))
-
-        pdf_path = f"anschreiben_{job_title}.pdf"
-        pdf = FPDF()
-        pdf.add_page()
-
-        paragraphs = text.strip().split("\n\n")
-        title = paragraphs[0]
-        rest = paragraphs[1:]
-
-        # Title bold, size 11
-        pdf.set_font("Arial", style="B", size=11)
-        pdf.multi_cell(0, 6, title)
-        pdf.ln(4)
-
-        # Body regular, size 11
-        pdf.set_font("Arial", size=11)
-        for paragraph in rest:
-            for line in paragraph.split("\n"):
-                pdf.multi_cell(0, 6, line)
-            pdf.ln(4)
-
-        pdf.output(pdf_path)
-        return pdf_path
-    except Exception as e:
-        logger.error(f"Fehler beim Generieren des PDFs: {e}")
-        return None
-def send_application_email(to_address, job_title):
-    smtp_host = os.getenv("SMTP_HOST")
-    smtp_port = int(os.getenv("SMTP_PORT", 587))
-    smtp_user = os.getenv("SMTP_USER")
-    smtp_pass = os.getenv("SMTP_PASSWORD")
+def build_application_email(to_address, job_title, cover_letter=None):
     sender_name = os.getenv("SENDER_NAME", "JobBot")
-    sender_email = smtp_user
+    sender_email = os.getenv("SMTP_FROM") or os.getenv("SMTP_USER")
 
     msg = EmailMessage()
     msg["Subject"] = f"Bewerbung: {job_title}"
@@ -60,39 +25,51 @@ def send_application_email(to_address, job_title):
     msg["To"] = to_address
     msg.set_content(f"Sehr geehrte Damen und Herren,\n\nhiermit bewerbe ich mich auf die Stelle '{job_title}'.\nIm Anhang finden Sie meine Unterlagen.\n\nMit freundlichen Grüßen\n{sender_name}")
 
-    # Anhänge
-    pdf = generate_dynamic_pdf(job_title)
-    files = ["lebenslauf.pdf", "zeugnisse.pdf"]
-    if pdf:
-        files.append(pdf)
+    # Anhänge (Anschreiben wird vorab im PDF-Pool gerendert)
+    for _, filename, data in application_attachments(cover_letter):
+        if data is not None:
+            msg.add_attachment(data, maintype="application", subtype="pdf", filename=filename)
 
-    for filename in files:
-        if os.path.exists(filename):
-            with open(filename, "rb") as f:
-                msg.add_attachment(f.read(), maintype="application", subtype="pdf", filename=os.path.basename(filename))
-
-    try:
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_pass)
-            server.send_message(msg)
-        return True
-    except Exception as e:
-        logger.error(f"E-Mail-Sendeproblem: {e}")
-        return False
+    return msg
 
 
 import os
 import json
+import zlib
+import zipfile
+import io
 import re
 import logging
 import asyncio
 import urllib.parse
-import requests
-from datetime import datetime, timedelta
+import aiohttp
+import hashlib
+import sqlite3
+import threading
+import random
+from openai import AsyncOpenAI
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+import sys
+import bisect
+import traceback
+import aiohttp.web
+from contextlib import contextmanager
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import time
+import math
+import mmap
+import struct
+from dataclasses import dataclass, field, fields, replace
+from datetime import datetime, timedelta, timezone
 from logging.handlers import TimedRotatingFileHandler
 from zoneinfo import ZoneInfo
 from bs4 import BeautifulSoup
+import lxml.html
+HTML_PARSER = "lxml"  # deutlich schneller als html.parser
 
 import discord
 from discord.ext import commands
@@ -116,232 +93,2379 @@ CHANNEL_ID = int(os.getenv("DISCORD_CHANNEL_ID"))
 APP_ID = os.getenv("ADZUNA_APP_ID")
 APP_KEY = os.getenv("ADZUNA_APP_KEY")
 COUNTRY = os.getenv("ADZUNA_COUNTRY", "de")
+# Adzuna: Treffer pro Seite (API-Maximum 50), gewünschte Treffer je Keyword und Suche,
+# gleichzeitig geladene Seiten, Tageskontingent an API-Aufrufen (0 = unbegrenzt)
+ADZUNA_PAGE_SIZE = max(1, min(50, int(os.getenv("ADZUNA_PAGE_SIZE", 50))))
+ADZUNA_TARGET_RESULTS = int(os.getenv("ADZUNA_TARGET_RESULTS", 100))
+ADZUNA_PAGE_CONCURRENCY = int(os.getenv("ADZUNA_PAGE_CONCURRENCY", 3))
+ADZUNA_DAILY_QUOTA = int(os.getenv("ADZUNA_DAILY_QUOTA", 250))
 ERROR_WEBHOOK_URL = os.getenv("ERROR_WEBHOOK_URL")
+# Fehler-Webhook: Sendeintervall (s), Zeitfenster je Fehlerart (s), max. gepufferte Fehlerarten
+ERROR_FLUSH_INTERVAL = float(os.getenv("ERROR_FLUSH_INTERVAL", 30))
+ERROR_WINDOW = float(os.getenv("ERROR_WINDOW", 600))
+ERROR_BUFFER_SIZE = int(os.getenv("ERROR_BUFFER_SIZE", 200))
+
+# Parallele Abfragen pro Host und Zeitlimits der Jobsuche (Sekunden)
+HOST_CONCURRENCY = int(os.getenv("HOST_CONCURRENCY", 4))
+REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", 20))
+SEARCH_DEADLINE = int(os.getenv("SEARCH_DEADLINE", 90))
+# Adaptives Rate-Limit je Host (Requests/s, Burst, Untergrenze nach 429/503) und
+# Circuit-Breaker (Fehler in Folge bis zum Öffnen, Sekunden bis zum Probe-Request)
+HOST_RATE = float(os.getenv("HOST_RATE", 2))
+HOST_BURST = float(os.getenv("HOST_BURST", 4))
+HOST_MIN_RATE = float(os.getenv("HOST_MIN_RATE", 0.05))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", 5))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", 300))
+# Inkrementelle Suche: Quellen ohne Datumsfilter höchstens alle n Sekunden abfragen,
+# Sicherheitsabstand (s) zum neuesten bekannten created-Zeitstempel
+SOURCE_MIN_INTERVAL = int(os.getenv("SOURCE_MIN_INTERVAL", 3 * 3600))
+CURSOR_OVERLAP = int(os.getenv("CURSOR_OVERLAP", 3600))
+CURSOR_MAX_IDS = int(os.getenv("CURSOR_MAX_IDS", 200))  # gemerkte Anzeigen-IDs je Quelle ohne Datumsfilter
+
+# Gemeinsamer HTTP-Verbindungspool (Keep-Alive)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 32))
+HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", 8))
+HTTP_KEEPALIVE = int(os.getenv("HTTP_KEEPALIVE", 60))
+
+# Worker je Lastklasse: Netzwerk/OpenAI (Threads), HTML-Parsing und PDF (Prozesse)
+NET_WORKERS = int(os.getenv("NET_WORKERS", 8))
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", 2))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", 2))
+EXECUTOR_QUEUE_FACTOR = int(os.getenv("EXECUTOR_QUEUE_FACTOR", 4))
+
+# PDFs: Ablageverzeichnis, Größenlimit (MB, älteste Dateien fliegen zuerst), Anschreiben-Vorlage
+PDF_DIR = Path(os.getenv("PDF_DIR", "/opt/discord-jobbot/saved_pdfs"))
+PDF_DIR_MAX_MB = int(os.getenv("PDF_DIR_MAX_MB", 200))
+COVER_LETTER_TEMPLATE = os.getenv("COVER_LETTER_TEMPLATE", "anschreiben_vorlage.txt")
+# E-Mail-Outbox: STARTTLS an/aus (aus z. B. für aiosmtpd), Zustellversuche,
+# Sekunden bis eine ungenutzte SMTP-Verbindung geschlossen wird
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes")
+SMTP_MAX_ATTEMPTS = int(os.getenv("SMTP_MAX_ATTEMPTS", 5))
+SMTP_IDLE_TIMEOUT = int(os.getenv("SMTP_IDLE_TIMEOUT", 60))
+# Feste Bewerbungsanhänge (kommagetrennt), werden einmal geladen und im Speicher gehalten
+APPLICATION_FILES = [f.strip() for f in os.getenv("APPLICATION_FILES", "lebenslauf.pdf,zeugnisse.pdf").split(",") if f.strip()]
+# /export_favorites: gleichzeitig bearbeitete Jobs (Seitenabruf, Zusammenfassung, Rendern)
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", 8))
+
+# Instrumentierung: Loop-Lag-Messintervall und Blockier-Schwelle (s), lokaler Metrik-Port (0 = aus)
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", 0.5))
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", 1.0))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9108))
 
 CONFIG_FILE = "config.json"
+CONFIG_POLL_INTERVAL = float(os.getenv("CONFIG_POLL_INTERVAL", 5))  # s zwischen mtime-Prüfungen
 JOBS_SEEN_FILE = "jobs_seen.json"
 SAVED_JOBS_FILE = "saved_jobs.json"
+DB_FILE = os.getenv("JOBBOT_DB", "jobbot.db")
+SEEN_INDEX_FILE = os.getenv("SEEN_INDEX_FILE", "jobs_seen.idx")
+
+# Gesehene Jobs verfallen nach SEEN_RETENTION_DAYS (Bloom-Filter je Zeitfenster)
+SEEN_RETENTION_DAYS = int(os.getenv("SEEN_RETENTION_DAYS", 90))
+SEEN_BUCKET_DAYS = int(os.getenv("SEEN_BUCKET_DAYS", 15))
+SEEN_BUCKET_CAPACITY = int(os.getenv("SEEN_BUCKET_CAPACITY", 20000))
+SEEN_FP_RATE = float(os.getenv("SEEN_FP_RATE", 0.001))
+
+# Dubletten: maximaler SimHash-Abstand (Bits) der Titel und Mindest-Überlappung der Titelwörter
+DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", 3))
+DEDUP_MIN_SIMILARITY = float(os.getenv("DEDUP_MIN_SIMILARITY", 0.8))
+# Maximaler SimHash-Abstand (Bits) der Beschreibungen, wenn beide Stellen eine haben,
+# und wie viele Wörter vom Anfang der Beschreibung in den Hash eingehen
+DEDUP_MAX_DESCRIPTION_DISTANCE = int(os.getenv("DEDUP_MAX_DESCRIPTION_DISTANCE", 12))
+DESCRIPTION_HASH_TOKENS = int(os.getenv("DESCRIPTION_HASH_TOKENS", 60))
+
+# Kununu-Cache: Gültigkeit für Treffer / Nicht-Treffer, max. Einträge, Prüfintervall (s)
+KUNUNU_TTL = int(os.getenv("KUNUNU_TTL_DAYS", 7)) * 86400
+KUNUNU_NEGATIVE_TTL = int(os.getenv("KUNUNU_NEGATIVE_TTL_HOURS", 24)) * 3600
+KUNUNU_CACHE_SIZE = int(os.getenv("KUNUNU_CACHE_SIZE", 5000))
+KUNUNU_REFRESH_INTERVAL = int(os.getenv("KUNUNU_REFRESH_INTERVAL", 600))
+
+# GPT-Zusammenfassungen: max. Einträge im Cache und Gültigkeit
+GPT_CACHE_SIZE = int(os.getenv("GPT_CACHE_SIZE", 2000))
+GPT_CACHE_TTL = int(os.getenv("GPT_CACHE_TTL_DAYS", 30)) * 86400
+
+# Stellenseiten-Cache: Sekunden bis zur Revalidierung (ETag/Last-Modified), max. Seiten
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", 6 * 3600))
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", 1000))
+
+# OpenAI: Frist pro Request (s), Wiederholungen bei 429/5xx, Tokens pro Minute, max. Eingabe-Tokens je Anzeige
+GPT_DEADLINE = float(os.getenv("GPT_DEADLINE", 60))
+GPT_MAX_RETRIES = int(os.getenv("GPT_MAX_RETRIES", 4))
+GPT_TOKENS_PER_MINUTE = int(os.getenv("GPT_TOKENS_PER_MINUTE", 30000))
+GPT_INPUT_TOKENS = int(os.getenv("GPT_INPUT_TOKENS", 1500))
+
+# Vorab-Zusammenfassung neuer Jobs ("presummarize" in config.json): Anzeigen pro
+# Request, parallele Requests, Eingabe-Tokens pro Request und pro Suchlauf
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", 5))
+SUMMARY_BATCH_CONCURRENCY = int(os.getenv("SUMMARY_BATCH_CONCURRENCY", 2))
+SUMMARY_BATCH_INPUT_TOKENS = int(os.getenv("SUMMARY_BATCH_INPUT_TOKENS", 8000))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", 60000))
+
+# Discord-Posting: Nachrichten pro Zeitfenster (s) je Kanal, Wartezeit auf Kununu vor dem Senden (s)
+DISCORD_POST_RATE = int(os.getenv("DISCORD_POST_RATE", 5))
+DISCORD_POST_PER = float(os.getenv("DISCORD_POST_PER", 5))
+KUNUNU_ENRICH_TIMEOUT = float(os.getenv("KUNUNU_ENRICH_TIMEOUT", 5))
 
 # -------- Discord Setup --------
 intents = discord.Intents.default()
-bot = commands.Bot(command_prefix="!", intents=intents)
+class JobBot(commands.Bot):
+    async def close(self):
+        if ERROR_WEBHOOK_URL:
+            await error_reporter.flush(force=True)
+        await close_http_session()
+        await close_smtp()
+        shutdown_executors()
+        await super().close()
+
+
+bot = JobBot(command_prefix="!", intents=intents)
 tree = bot.tree
-daily_search_task = None  # Scheduled job task
 # -------- Helper Functions --------
-def load_config():
-    if not os.path.exists(CONFIG_FILE):
-        default = {"location": "Coburg", "radius": 100, "keywords": ["system administrator"], "work_type": "all", "execution_time": "12:00"}
-        with open(CONFIG_FILE, "w") as f:
-            json.dump(default, f, indent=2)
-    with open(CONFIG_FILE) as f:
-        return json.load(f)
-
-def save_config(config: dict):
-    with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-        json.dump(config, f, indent=2)
-
-def load_seen_jobs():
-    if not os.path.exists(JOBS_SEEN_FILE):
-        with open(JOBS_SEEN_FILE, "w") as f:
-            json.dump({"posted_ids": []}, f)
-    with open(JOBS_SEEN_FILE) as f:
-        return set(json.load(f)["posted_ids"])
-
-def save_seen_jobs(job_ids):
-    with open(JOBS_SEEN_FILE, "w") as f:
-        json.dump({"posted_ids": list(job_ids)}, f, indent=2)
+# Die Konfiguration liegt geprüft als BotConfig im Speicher. get_config() macht nur
+# ein stat() und liest config.json neu, wenn sich die Datei geändert hat;
+# set_config() schreibt atomar (Temp-Datei + os.replace) und unter Lock.
+# Abonnenten (subscribe_config) erfahren von jeder Änderung, auch von Hand.
+@dataclass(frozen=True)
+class BotConfig:
+    location: str = "Coburg"
+    radius: int = 100
+    keywords: tuple = ("system administrator",)
+    work_type: str = ""  # "" = alle Arbeitsmodelle
+    execution_time: str = "12:00"
+    sources: tuple = None  # None = alle registrierten Quellen
+    presummarize: bool = False
+    extra: dict = field(default_factory=dict, compare=False)  # unbekannte Schlüssel bleiben erhalten
+
+_config = None
+_config_version = None
+_config_lock = threading.RLock()
+_config_subscribers = []
+
+def _parse_config(data: dict) -> BotConfig:
+    data = dict(data)
+    # Ältere config.json-Dateien nennen die Uhrzeit daily_search_time
+    if "daily_search_time" in data:
+        data.setdefault("execution_time", data.pop("daily_search_time"))
+    known = {f.name for f in fields(BotConfig)} - {"extra"}
+    config = BotConfig(extra={k: v for k, v in data.items() if k not in known})
+    changes = {}
+
+    if isinstance(data.get("location"), str) and data["location"].strip():
+        changes["location"] = data["location"].strip()
+    try:
+        if int(data.get("radius", config.radius)) > 0:
+            changes["radius"] = int(data.get("radius", config.radius))
+    except (TypeError, ValueError):
+        logger.warning(f"Ungültiger Radius in {CONFIG_FILE}: {data.get('radius')!r}")
+    keywords = data.get("keywords")
+    if isinstance(keywords, str):
+        keywords = keywords.split(",")
+    if isinstance(keywords, list):
+        keywords = tuple(str(kw).strip() for kw in keywords if str(kw).strip())
+        if keywords:
+            changes["keywords"] = keywords
+    work_type = data.get("work_type") or ""
+    changes["work_type"] = "" if work_type == "all" else str(work_type)
+    try:
+        datetime.strptime(str(data.get("execution_time", config.execution_time)), "%H:%M")
+        changes["execution_time"] = str(data.get("execution_time", config.execution_time))
+    except ValueError:
+        logger.warning(f"Ungültige Uhrzeit in {CONFIG_FILE}: {data.get('execution_time')!r}")
+    if isinstance(data.get("sources"), list):
+        changes["sources"] = tuple(data["sources"])
+    changes["presummarize"] = bool(data.get("presummarize", False))
+    return replace(config, **changes)
+
+def _config_dict(config: BotConfig) -> dict:
+    data = dict(config.extra)
+    data.update(
+        location=config.location,
+        radius=config.radius,
+        keywords=list(config.keywords),
+        work_type=config.work_type,
+        execution_time=config.execution_time,
+    )
+    if config.sources is not None:
+        data["sources"] = list(config.sources)
+    if config.presummarize:
+        data["presummarize"] = True
+    return data
+
+def _write_config(config: BotConfig):
+    tmp_path = f"{CONFIG_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(_config_dict(config), f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, CONFIG_FILE)
+
+def _file_version():
+    try:
+        stat = os.stat(CONFIG_FILE)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _apply_config(config: BotConfig):
+    global _config, _config_version
+    old, _config = _config, config
+    _config_version = _file_version()
+    if old is not None and old != config:
+        for callback in list(_config_subscribers):
+            try:
+                callback(old, config)
+            except Exception as e:
+                logger.error(f"Fehler in Config-Abonnent: {e}")
+
+def get_config() -> BotConfig:
+    global _config_version
+    version = _file_version()
+    if _config is not None and version == _config_version:
+        return _config
+    with _config_lock:
+        if version is None:
+            _write_config(_config or BotConfig())
+            version = _file_version()
+        if _config is None or version != _config_version:
+            try:
+                with open(CONFIG_FILE, encoding="utf-8") as f:
+                    config = _parse_config(json.load(f))
+            except (OSError, ValueError) as e:
+                # Halb geschriebene oder kaputte Datei: alte Fassung behalten
+                logger.error(f"{CONFIG_FILE} konnte nicht gelesen werden: {e}")
+                if _config is not None:
+                    _config_version = version  # erst nach der nächsten Änderung erneut versuchen
+                    return _config
+                config = BotConfig()
+            _apply_config(config)
+            logger.info(f"⚙️ Konfiguration geladen: {CONFIG_FILE}")
+        return _config
+
+def set_config(**changes) -> BotConfig:
+    with _config_lock:
+        config = _parse_config(_config_dict(replace(get_config(), **changes)))
+        _write_config(config)
+        _apply_config(config)
+        return config
+
+def subscribe_config(callback):
+    # callback(alt, neu) läuft synchron im Thread, der die Änderung bemerkt
+    _config_subscribers.append(callback)
+
+async def config_watcher():
+    # Bemerkt auch Änderungen, die niemand über get_config() abfragt
+    while True:
+        await asyncio.sleep(CONFIG_POLL_INTERVAL)
+        get_config()
+
+# -------- Job-Datenbank (SQLite) --------
+_db_conn = None
+_db_lock = threading.RLock()
+
+DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    source TEXT,
+    title TEXT,
+    company TEXT,
+    location TEXT,
+    url TEXT,
+    created TEXT,
+    first_seen REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_first_seen ON jobs(first_seen);
+CREATE TABLE IF NOT EXISTS saved_jobs (
+    id TEXT PRIMARY KEY,
+    saved_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_saved_jobs_saved_at ON saved_jobs(saved_at);
+CREATE TABLE IF NOT EXISTS job_fingerprints (
+    job_id TEXT PRIMARY KEY,
+    simhash INTEGER NOT NULL,
+    b0 INTEGER NOT NULL,
+    b1 INTEGER NOT NULL,
+    b2 INTEGER NOT NULL,
+    b3 INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    company TEXT NOT NULL,
+    city TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    description_hash INTEGER NOT NULL DEFAULT 0,
+    source TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_b0 ON job_fingerprints(b0);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_b1 ON job_fingerprints(b1);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_b2 ON job_fingerprints(b2);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_b3 ON job_fingerprints(b3);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_first_seen ON job_fingerprints(first_seen);
+CREATE TABLE IF NOT EXISTS kununu_cache (
+    company TEXT PRIMARY KEY,
+    rating TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_kununu_accessed_at ON kununu_cache(accessed_at);
+CREATE TABLE IF NOT EXISTS gpt_summaries (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_gpt_summaries_accessed_at ON gpt_summaries(accessed_at);
+CREATE TABLE IF NOT EXISTS job_pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body BLOB NOT NULL,
+    parser_version INTEGER NOT NULL,
+    artefacts TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_pages_accessed_at ON job_pages(accessed_at);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    to_address TEXT NOT NULL,
+    job_title TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    last_error TEXT,
+    created REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox(status, next_attempt);
+CREATE TABLE IF NOT EXISTS search_cursors (
+    source TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    location TEXT NOT NULL,
+    last_created TEXT,
+    last_run REAL NOT NULL,
+    last_ids TEXT,
+    PRIMARY KEY (source, keyword, location)
+);
+CREATE TABLE IF NOT EXISTS scheduler_runs (
+    job TEXT PRIMARY KEY,
+    last_run REAL NOT NULL,
+    last_status TEXT,
+    last_duration REAL
+);
+"""
+
+def get_db() -> sqlite3.Connection:
+    global _db_conn
+    with _db_lock:
+        if _db_conn is None:
+            conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(DB_SCHEMA)
+            _migrate_schema(conn)
+            _migrate_json_files(conn)
+            _db_conn = conn
+        return _db_conn
+
+# Spalten, die nach dem ersten Anlegen einer Tabelle dazugekommen sind
+SCHEMA_COLUMNS = [
+    ("job_fingerprints", "description_hash", "INTEGER NOT NULL DEFAULT 0"),
+    ("job_fingerprints", "source", "TEXT NOT NULL DEFAULT ''"),
+    ("search_cursors", "last_ids", "TEXT"),
+]
+
+def _migrate_schema(conn):
+    for table, column, declaration in SCHEMA_COLUMNS:
+        columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            with conn:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+# Einmalige Übernahme von jobs_seen.json / saved_jobs.json in die Datenbank
+def _migrate_json_files(conn):
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+        return
+    now = time.time()
+    with conn:
+        if os.path.exists(SAVED_JOBS_FILE):
+            with open(SAVED_JOBS_FILE) as f:
+                saved = json.load(f)
+            for i, job in enumerate(saved):
+                job.setdefault("id", f"saved-{hashlib.sha1(job.get('url', '').encode()).hexdigest()[:16]}")
+                conn.execute("INSERT OR REPLACE INTO saved_jobs (id, saved_at, data) VALUES (?, ?, ?)",
+                             (str(job["id"]), now + i / 1000, json.dumps(job)))
+            logger.info(f"📦 {len(saved)} Favoriten aus {SAVED_JOBS_FILE} übernommen.")
+        conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (str(now),))
+    if os.path.exists(SAVED_JOBS_FILE):
+        os.replace(SAVED_JOBS_FILE, SAVED_JOBS_FILE + ".migrated")
+
+
+# -------- Index gesehener Jobs --------
+class SeenIndex:
+    # Ringpuffer aus Bloom-Filtern, einer je SEEN_BUCKET_DAYS Tage. Die Datei
+    # wird per mmap eingebunden; Abfragen und Einträge arbeiten direkt auf den
+    # gemappten Bytes, abgelaufene Zeitfenster werden beim Wiederverwenden genullt.
+    MAGIC = b"JBSI"
+    HEADER = struct.Struct("<4sHHIII")  # magic, version, hashes, bits, bucket_days, buckets
+
+    def __init__(self, path, bits, hashes, bucket_days, buckets):
+        self.path = path
+        self.bits = bits
+        self.hashes = hashes
+        self.bucket_days = bucket_days
+        self.buckets = buckets
+        self._bucket_bytes = bits // 8
+        self._starts_offset = self.HEADER.size
+        self._data_offset = self._starts_offset + 4 * buckets
+        self._lock = threading.Lock()
+        size = self._data_offset + buckets * self._bucket_bytes
+
+        if not os.path.exists(path) or os.path.getsize(path) != size:
+            with open(path, "wb") as f:
+                f.write(self.HEADER.pack(self.MAGIC, 1, hashes, bits, bucket_days, buckets))
+                f.write(struct.pack(f"<{buckets}i", *([-1] * buckets)))
+                f.truncate(size)
+        self._file = open(path, "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), size)
+
+    @classmethod
+    def open(cls, path, retention_days, bucket_days, capacity, fp_rate):
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                header = f.read(cls.HEADER.size)
+            if len(header) == cls.HEADER.size:
+                magic, version, hashes, bits, file_bucket_days, buckets = cls.HEADER.unpack(header)
+                if magic == cls.MAGIC and version == 1:
+                    # Größe der bestehenden Datei gewinnt, sonst wären alle Einträge verloren
+                    return cls(path, bits, hashes, file_bucket_days, buckets)
+            logger.warning(f"⚠️ {path} unlesbar, Index wird neu angelegt.")
+            os.remove(path)
+        bits = -capacity * math.log(fp_rate) / (math.log(2) ** 2)
+        bits = int(math.ceil(bits / 64) * 64)
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        buckets = math.ceil(retention_days / bucket_days) + 1
+        return cls(path, bits, hashes, bucket_days, buckets)
+
+    def _positions(self, job_id):
+        digest = hashlib.blake2b(str(job_id).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def _start(self, slot):
+        return struct.unpack_from("<i", self._mm, self._starts_offset + 4 * slot)[0]
+
+    def _live_slots(self, today):
+        oldest = today - SEEN_RETENTION_DAYS - self.bucket_days
+        return [slot for slot in range(self.buckets) if self._start(slot) > oldest]
+
+    def _current_slot(self, today):
+        start = today - today % self.bucket_days
+        slot = (start // self.bucket_days) % self.buckets
+        if self._start(slot) != start:
+            offset = self._data_offset + slot * self._bucket_bytes
+            self._mm[offset:offset + self._bucket_bytes] = bytes(self._bucket_bytes)
+            struct.pack_into("<i", self._mm, self._starts_offset + 4 * slot, start)
+        return slot
+
+    def __contains__(self, job_id):
+        positions = self._positions(job_id)
+        today = int(time.time() // 86400)
+        with self._lock:
+            for slot in self._live_slots(today):
+                offset = self._data_offset + slot * self._bucket_bytes
+                if all(self._mm[offset + (p >> 3)] & (1 << (p & 7)) for p in positions):
+                    return True
+        return False
+
+    def add_many(self, job_ids):
+        today = int(time.time() // 86400)
+        with self._lock:
+            offset = self._data_offset + self._current_slot(today) * self._bucket_bytes
+            for job_id in job_ids:
+                for p in self._positions(job_id):
+                    self._mm[offset + (p >> 3)] |= 1 << (p & 7)
+            self._mm.flush()
+
+    def close(self):
+        with self._lock:
+            self._mm.close()
+            self._file.close()
+
+
+_seen_index = None
+
+def get_seen_index() -> SeenIndex:
+    global _seen_index
+    with _db_lock:
+        if _seen_index is None:
+            created = not os.path.exists(SEEN_INDEX_FILE)
+            _seen_index = SeenIndex.open(SEEN_INDEX_FILE, SEEN_RETENTION_DAYS, SEEN_BUCKET_DAYS,
+                                         SEEN_BUCKET_CAPACITY, SEEN_FP_RATE)
+            if created:
+                _import_legacy_seen(_seen_index)
+        return _seen_index
+
+# Übernimmt gesehene IDs aus jobs_seen.json bzw. der alten seen_jobs-Tabelle
+def _import_legacy_seen(index):
+    ids = []
+    if os.path.exists(JOBS_SEEN_FILE):
+        with open(JOBS_SEEN_FILE) as f:
+            ids += [str(job_id) for job_id in json.load(f).get("posted_ids", [])]
+        os.replace(JOBS_SEEN_FILE, JOBS_SEEN_FILE + ".migrated")
+    db = get_db()
+    if db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'seen_jobs'").fetchone():
+        ids += [row["id"] for row in db.execute("SELECT id FROM seen_jobs")]
+        with db:
+            db.execute("DROP TABLE seen_jobs")
+    if ids:
+        index.add_many(ids)
+        logger.info(f"📦 {len(ids)} gesehene Jobs in {SEEN_INDEX_FILE} übernommen.")
+
+def filter_unseen(job_ids) -> set:
+    index = get_seen_index()
+    return {job_id for job_id in set(job_ids) if job_id not in index}
+
+def mark_jobs_seen(jobs):
+    now = time.time()
+    get_seen_index().add_many(job["id"] for job in jobs)
+    db = get_db()
+    with _db_lock, db:
+        db.execute("DELETE FROM jobs WHERE first_seen < ?", (now - SEEN_RETENTION_DAYS * 86400,))
+        db.executemany(
+            "INSERT OR IGNORE INTO jobs (id, source, title, company, location, url, created, first_seen, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((job["id"], job.get("source"), job.get("title"), job.get("company"), job.get("location"),
+              job.get("url"), job.get("created"), now, json.dumps(job)) for job in jobs),
+        )
+
+# -------- Quellenübergreifende Dubletten --------
+GENDER_MARKER_RE = re.compile(r"\(?\b[mwfdx](?:\s*/\s*[mwfdx]){1,2}\b\)?|\(all genders?\)|[*:]in\b", re.IGNORECASE)
+PLACEHOLDER_COMPANIES = {"", "unbekannt", "arbeitsagentur", "honeypot", "ihk"}
+
+def _title_tokens(title: str) -> list:
+    return re.findall(r"[a-z0-9äöüß+#]+", GENDER_MARKER_RE.sub(" ", title.lower()))
+
+def _simhash(features) -> int:
+    weights = [0] * 64
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+def _shingles(tokens) -> list:
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+# SimHash über Titel-Wörter und -Wortpaare plus normalisierte Firma/Ort und Quelle.
+# Dazu ein SimHash über den Anfang der Beschreibung (Adzuna-Snippet bzw. Text der
+# Stellenseite, siehe add_page_descriptions); ohne Beschreibung bleibt er 0.
+def job_fingerprint(job) -> tuple:
+    tokens = _title_tokens(job.get("title") or "")
+    features = _shingles(tokens)
+    description = re.findall(r"[a-z0-9äöüß+#]+", (job.get("description") or "").lower())[:DESCRIPTION_HASH_TOKENS]
+    description_hash = _simhash(_shingles(description)) if description else 0
+    company = normalize_company_name(job.get("company") or "").lower()
+    if company in PLACEHOLDER_COMPANIES:
+        company = ""
+    city = (job.get("location") or "").split(",")[0].strip().lower()
+    if city == "unbekannt":
+        city = ""
+    return _simhash(features), " ".join(tokens), company, city, description_hash, job.get("source") or ""
+
+def _bands(simhash: int) -> list:
+    # 4 Bänder à 16 Bit: bei <= 3 abweichenden Bits stimmt mindestens ein Band exakt
+    return [(simhash >> (16 * i)) & 0xFFFF for i in range(4)]
+
+# Zwei Anzeigen derselben Quelle sind nie eine Dublette (das erledigt die ID).
+# Ohne echte Firma (Platzhalter wie "Arbeitsagentur") reicht der Titel nicht:
+# dann müssen beide Beschreibungen vorliegen und übereinstimmen.
+def _same_posting(a, b) -> bool:
+    (hash_a, title_a, company_a, city_a, desc_a, source_a) = a
+    (hash_b, title_b, company_b, city_b, desc_b, source_b) = b
+    if source_a == source_b:
+        return False
+    if (hash_a ^ hash_b).bit_count() > DEDUP_MAX_DISTANCE:
+        return False
+    # SimHash liefert nur Kandidaten; "Junior" vs. "Senior" scheitert an der Wortüberlappung
+    words_a, words_b = set(title_a.split()), set(title_b.split())
+    if len(words_a & words_b) < DEDUP_MIN_SIMILARITY * len(words_a | words_b):
+        return False
+    same_description = bool(desc_a and desc_b) and (desc_a ^ desc_b).bit_count() <= DEDUP_MAX_DESCRIPTION_DISTANCE
+    if desc_a and desc_b and not same_description:
+        return False
+    if company_a and company_b:
+        if company_a != company_b:
+            return False
+    elif not same_description:
+        return False
+    return not (city_a and city_b and city_a != city_b)
+
+def _to_signed(value: int) -> int:
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+# Filtert Stellen, die es unter anderer ID/URL schon gab (in diesem oder
+# früheren Durchläufen). Kandidaten kommen über die Band-Indizes, nicht paarweise.
+def drop_duplicate_postings(jobs) -> list:
+    db = get_db()
+    cycle_bands = {}
+    unique, rows = [], []
+    now = time.time()
+    for job in jobs:
+        fp = job_fingerprint(job)
+        bands = _bands(fp[0])
+        candidates = [cand for i, band in enumerate(bands) for cand in cycle_bands.get((i, band), [])]
+        with _db_lock:
+            candidates += [
+                (row["simhash"] & 0xFFFFFFFFFFFFFFFF, row["title"], row["company"], row["city"],
+                 row["description_hash"] & 0xFFFFFFFFFFFFFFFF, row["source"])
+                for row in db.execute(
+                    "SELECT simhash, title, company, city, description_hash, source FROM job_fingerprints "
+                    "WHERE b0 = ? OR b1 = ? OR b2 = ? OR b3 = ?",
+                    bands,
+                )
+            ]
+        if any(_same_posting(fp, cand) for cand in candidates):
+            logger.info(f"♻️ Dublette übersprungen: {job['title']} ({job.get('source')})")
+            continue
+        for i, band in enumerate(bands):
+            cycle_bands.setdefault((i, band), []).append(fp)
+        unique.append(job)
+        rows.append((job["id"], _to_signed(fp[0]), *bands, *fp[1:4], now, _to_signed(fp[4]), fp[5]))
+
+    with _db_lock, db:
+        db.execute("DELETE FROM job_fingerprints WHERE first_seen < ?", (now - SEEN_RETENTION_DAYS * 86400,))
+        db.executemany(
+            "INSERT OR IGNORE INTO job_fingerprints (job_id, simhash, b0, b1, b2, b3, title, company, city, "
+            "first_seen, description_hash, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+    return unique
+
+# Stellen ohne echte Firma lassen sich nur über die Beschreibung zuordnen: dafür
+# die Stellenseite laden (landet ohnehin im Seiten-Cache für den PDF-Export).
+async def add_page_descriptions(jobs):
+    jobs = [
+        job for job in jobs
+        if not job.get("description")
+        and normalize_company_name(job.get("company") or "").lower() in PLACEHOLDER_COMPANIES
+    ]
+    if not jobs:
+        return
+    tasks = [asyncio.create_task(fetch_job_page(job["url"])) for job in jobs]
+    _, pending = await asyncio.wait(tasks, timeout=REQUEST_TIMEOUT)
+    for task in pending:
+        task.cancel()
+    for job, task in zip(jobs, tasks):
+        if task in pending or task.exception():
+            continue
+        page = task.result()
+        text = page["description"] or page["text"]
+        if text:
+            job["description"] = text[:2000]
 
 def save_job(job):
-    jobs = []
-    if os.path.exists(SAVED_JOBS_FILE):
-        with open(SAVED_JOBS_FILE) as f:
-            jobs = json.load(f)
-    jobs.append(job)
-    with open(SAVED_JOBS_FILE, "w") as f:
-        json.dump(jobs, f, indent=2)
+    db = get_db()
+    with _db_lock, db:
+        db.execute("INSERT OR REPLACE INTO saved_jobs (id, saved_at, data) VALUES (?, ?, ?)",
+                   (job["id"], time.time(), json.dumps(job)))
+
+def update_saved_job(job):
+    # Daten ergänzen, ohne die Reihenfolge (saved_at) zu ändern
+    db = get_db()
+    with _db_lock, db:
+        db.execute("UPDATE saved_jobs SET data = ? WHERE id = ?", (json.dumps(job), job["id"]))
+
+def load_saved_jobs(limit=None):
+    # Älteste zuerst; mit limit nur die letzten n Favoriten
+    db = get_db()
+    with _db_lock:
+        if limit:
+            rows = db.execute("SELECT data FROM saved_jobs ORDER BY saved_at DESC LIMIT ?", (limit,)).fetchall()
+            rows.reverse()
+        else:
+            rows = db.execute("SELECT data FROM saved_jobs ORDER BY saved_at").fetchall()
+    return [json.loads(row["data"]) for row in rows]
 
-def load_saved_jobs():
-    if os.path.exists(SAVED_JOBS_FILE):
-        with open(SAVED_JOBS_FILE) as f:
-            return json.load(f)
-    return []
+def remove_saved_job(job_id):
+    db = get_db()
+    with _db_lock, db:
+        db.execute("DELETE FROM saved_jobs WHERE id = ?", (job_id,))
 
 def clear_saved_jobs():
-    with open(SAVED_JOBS_FILE, "w") as f:
-        json.dump([], f)
+    db = get_db()
+    with _db_lock, db:
+        db.execute("DELETE FROM saved_jobs")
 
 
-def send_error_to_webhook(error_text):
-    if ERROR_WEBHOOK_URL:
+async def post_webhook(url: str, payload: dict):
+    async with get_http_session().post(url, json=payload) as r:
+        r.raise_for_status()
+
+# Hintergrund-Tasks referenzieren, damit sie nicht vorzeitig eingesammelt werden
+_background_tasks = set()
+
+def spawn(coro):
+    task = asyncio.get_running_loop().create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+def _post_webhook_soon(url: str, payload: dict, label: str):
+    async def _send():
         try:
-            requests.post(ERROR_WEBHOOK_URL, json={"content": f"🚨 Bot Error:\n```{error_text}```"})
+            await post_webhook(url, payload)
         except Exception as e:
-            logger.error(f"Fehler beim Senden an Webhook: {e}")
+            logger.error(f"Fehler beim Senden an {label}: {e}")
+    try:
+        spawn(_send())
+    except RuntimeError:
+        logger.error(f"Kein Event-Loop aktiv, {label} nicht gesendet.")
+
+# Fehler werden nicht einzeln gepostet: report() fasst gleiche Fehler (Zahlen
+# ignoriert) zusammen, der Flush-Task sendet jede Fehlerart höchstens einmal je
+# ERROR_WINDOW, mehrere Meldungen gebündelt. Scheitert der Webhook, landet der
+# Text im Log. report() ist threadsicher und kostet auch im Fehlersturm nur ein
+# Dict-Update.
+class ErrorReporter:
+    MESSAGE_LIMIT = 1900
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}      # Fingerprint -> [Text, Anzahl, erstes Auftreten]
+        self._last_sent = {}    # Fingerprint -> Zeitpunkt der letzten Meldung
+        self._dropped = 0
+        self._task = None
+
+    @staticmethod
+    def fingerprint(text: str) -> str:
+        return re.sub(r"\d+", "#", text)[:200]
+
+    def report(self, text: str):
+        key = self.fingerprint(text)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry:
+                entry[0] = text
+                entry[1] += 1
+            elif len(self._pending) < ERROR_BUFFER_SIZE:
+                self._pending[key] = [text, 1, time.time()]
+            else:
+                self._dropped += 1
+        inc("error_reports_total")
+
+    def _take_due(self, force=False):
+        now = time.time()
+        with self._lock:
+            # Abgelaufene Sendezeiten vergessen, damit das Dict nicht wächst
+            for key in [k for k, sent in self._last_sent.items() if now - sent >= ERROR_WINDOW]:
+                del self._last_sent[key]
+            due = [key for key in self._pending if force or key not in self._last_sent]
+            entries = [self._pending.pop(key) for key in due]
+            for key in due:
+                self._last_sent[key] = now
+            dropped, self._dropped = self._dropped, 0
+        return entries, dropped
+
+    @staticmethod
+    def _format(text, count, first):
+        if count == 1:
+            return f"🚨 Bot Error:\n```{text[:1500]}```"
+        minutes = max(1, round((time.time() - first) / 60))
+        return f"🚨 Bot Error ×{count} in den letzten {minutes} Min:\n```{text[:1500]}```"
+
+    async def flush(self, force=False):
+        entries, dropped = self._take_due(force)
+        parts = [self._format(*entry) for entry in entries]
+        if dropped:
+            parts.append(f"⚠️ {dropped} weitere Fehler verworfen (Puffer voll)")
+        # Mehrere Meldungen in möglichst wenigen Webhook-Posts bündeln
+        messages = []
+        for part in parts:
+            if messages and len(messages[-1]) + len(part) + 1 <= self.MESSAGE_LIMIT:
+                messages[-1] += "\n" + part
+            else:
+                messages.append(part)
+        for message in messages:
+            try:
+                await post_webhook(ERROR_WEBHOOK_URL, {"content": message})
+                inc("error_webhook_posts_total", result="sent")
+            except Exception as e:
+                inc("error_webhook_posts_total", result="failed")
+                logger.error(f"Fehler-Webhook nicht erreichbar ({e}), Meldung:\n{message}")
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(ERROR_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Fehler im Error-Reporter: {e}")
+
+    def start(self):
+        if ERROR_WEBHOOK_URL and (self._task is None or self._task.done()):
+            self._task = spawn(self.run())
+
+error_reporter = ErrorReporter()
+
+def send_error_to_webhook(error_text):
+    if ERROR_WEBHOOK_URL:
+        error_reporter.report(str(error_text))
 
 def send_job_to_webhook(message: str):
     job_url = os.getenv("JOB_WEBHOOK_URL")
     if job_url:
-        try:
-            requests.post(job_url, json={"content": message})
-        except Exception as e:
-            logger.error(f"Fehler beim Senden an JOB_WEBHOOK_URL: {e}")
+        _post_webhook_soon(job_url, {"content": message}, "JOB_WEBHOOK_URL")
 
 
 
-def fetch_jobs_agentur(keywords, location):
-    jobs = []
-    for kw in keywords:
-        q = urllib.parse.quote(kw)
-        url = f"https://jobboerse.arbeitsagentur.de/vamJB/start?aa=1&ref=home&stellenart=1&was={q}&wo={location}"
+# -------- Metriken --------
+class Histogram:
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        # Obergrenze des Buckets, in dem das Quantil liegt
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.BUCKETS + (self.max,), self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+_histograms = {}
+_counters = {}
+_metrics_lock = threading.Lock()
+
+def _metric_key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def observe(name, value, **labels):
+    key = _metric_key(name, labels)
+    with _metrics_lock:
+        if key not in _histograms:
+            _histograms[key] = Histogram()
+        _histograms[key].observe(value)
+
+def inc(name, value=1, **labels):
+    key = _metric_key(name, labels)
+    with _metrics_lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+@contextmanager
+def timed(name, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+def _prom_labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in items) + "}"
+
+def render_metrics() -> str:
+    lines = []
+    with _metrics_lock:
+        for (name, labels), value in sorted(_counters.items()):
+            lines.append(f"jobbot_{name}{_prom_labels(labels)} {value}")
+        for (name, labels), hist in sorted(_histograms.items()):
+            cumulative = 0
+            for bound, count in zip(Histogram.BUCKETS, hist.counts):
+                cumulative += count
+                lines.append(f"jobbot_{name}_bucket{_prom_labels(labels, le=bound)} {cumulative}")
+            lines.append(f"jobbot_{name}_bucket{_prom_labels(labels, le='+Inf')} {hist.count}")
+            lines.append(f"jobbot_{name}_sum{_prom_labels(labels)} {hist.total:.6f}")
+            lines.append(f"jobbot_{name}_count{_prom_labels(labels)} {hist.count}")
+    for name, value in http_pool_stats().items():
+        lines.append(f"jobbot_http_{name} {value}")
+    for host, stats in host_guard_stats().items():
+        for name, value in stats.items():
+            lines.append(f"jobbot_host_{name}{_prom_labels((('host', host),))} {value}")
+    return "\n".join(lines) + "\n"
+
+def stats_summary() -> str:
+    lines = []
+    with _metrics_lock:
+        for (name, labels), hist in sorted(_histograms.items()):
+            label = ", ".join(f"{v}" for _, v in labels)
+            lines.append(
+                f"{name}{f' [{label}]' if label else ''}: n={hist.count} "
+                f"Ø={hist.total / hist.count:.3f}s p95≤{hist.quantile(0.95):.3f}s max={hist.max:.3f}s"
+            )
+        for (name, labels), value in sorted(_counters.items()):
+            label = ", ".join(f"{v}" for _, v in labels)
+            lines.append(f"{name}{f' [{label}]' if label else ''}: {value}")
+    lines.append("http: " + ", ".join(f"{k}={v}" for k, v in http_pool_stats().items()))
+    for host, stats in host_guard_stats().items():
+        lines.append(f"host [{host}]: " + ", ".join(f"{k}={v}" for k, v in stats.items()))
+    return "\n".join(lines)
+
+
+# -------- Event-Loop-Überwachung --------
+# monitor_loop_lag() misst die Verspätung eines periodischen Sleeps; der
+# Watchdog-Thread loggt den Stack des Loop-Threads, wenn dieser länger als
+# LOOP_BLOCK_THRESHOLD keinen Herzschlag mehr gesetzt hat.
+_loop_heartbeat = time.monotonic()
+_instrumentation_started = False
+
+async def monitor_loop_lag():
+    global _loop_heartbeat
+    while True:
+        start = time.monotonic()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        _loop_heartbeat = time.monotonic()
+        observe("event_loop_lag_seconds", max(0.0, _loop_heartbeat - start - LOOP_LAG_INTERVAL))
+
+def _loop_watchdog(loop_thread_id):
+    reported = False
+    while True:
+        time.sleep(LOOP_BLOCK_THRESHOLD / 2)
+        blocked_for = time.monotonic() - _loop_heartbeat - LOOP_LAG_INTERVAL
+        if blocked_for < LOOP_BLOCK_THRESHOLD:
+            reported = False
+            continue
+        if reported:
+            continue
+        reported = True
+        inc("event_loop_blocked_total")
+        frame = sys._current_frames().get(loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame else "(kein Stack)"
+        logger.warning(f"🐢 Event-Loop seit {blocked_for:.1f}s blockiert:\n{stack}")
+
+async def _metrics_handler(request):
+    return aiohttp.web.Response(text=render_metrics(), content_type="text/plain")
+
+async def start_metrics_server():
+    app = aiohttp.web.Application()
+    app.router.add_get("/metrics", _metrics_handler)
+    runner = aiohttp.web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await aiohttp.web.TCPSite(runner, METRICS_HOST, METRICS_PORT).start()
+    logger.info(f"📈 Metriken unter http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+
+async def start_instrumentation():
+    global _instrumentation_started, _loop_heartbeat
+    if _instrumentation_started:
+        return
+    _instrumentation_started = True
+    _loop_heartbeat = time.monotonic()
+    spawn(monitor_loop_lag())
+    threading.Thread(target=_loop_watchdog, args=(threading.get_ident(),), name="jobbot-watchdog", daemon=True).start()
+    if METRICS_PORT:
         try:
-            headers = {"User-Agent": "Mozilla/5.0"}
-            r = requests.get(url, headers=headers, timeout=20)
-            soup = BeautifulSoup(r.text, "html.parser")
-            for joblink in soup.select("a.stellenangebot")[:3]:
-                title = joblink.text.strip()
-                href = joblink["href"]
-                jobs.append({
-                    "title": title,
-                    "company": "Arbeitsagentur",
-                    "location": location,
-                    "url": f"https://jobboerse.arbeitsagentur.de{href}",
-                    "source": "Agentur für Arbeit"
-                })
-        except Exception as e:
-            logger.error(f"Agentur fetch error: {e}")
-            send_error_to_webhook(f"Arbeitsagentur error: {e}")
-    return jobs
+            await start_metrics_server()
+        except OSError as e:
+            logger.error(f"Metrik-Server konnte nicht starten: {e}")
+
+
+# -------- Executor --------
+# Blockierender Code läuft nie auf dem Discord-Event-Loop. Jede Lastklasse hat
+# einen eigenen Pool; die Semaphore begrenzt die Warteschlange davor, damit
+# Lastspitzen bremsen statt Speicher zu fressen.
+_executors = {}
+_executor_slots = {}
+
+def _make_executor(kind):
+    if kind == "net":
+        return ThreadPoolExecutor(max_workers=NET_WORKERS, thread_name_prefix="jobbot-net")
+    workers = PARSE_WORKERS if kind == "parse" else PDF_WORKERS
+    # spawn: kein fork() eines Prozesses mit laufendem Event-Loop und Threads
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+async def run_blocking(kind, func, *args):
+    if kind not in _executors:
+        _executors[kind] = _make_executor(kind)
+        _executor_slots[kind] = asyncio.Semaphore(_executors[kind]._max_workers * EXECUTOR_QUEUE_FACTOR)
+    async with _executor_slots[kind]:
+        with timed("executor_task_seconds", pool=kind, task=func.__name__):
+            return await asyncio.get_running_loop().run_in_executor(_executors[kind], func, *args)
+
+def shutdown_executors():
+    for executor in _executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    _executors.clear()
+    _executor_slots.clear()
+
+
+# -------- Rate-Limits --------
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate            # Tokens pro Sekunde
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1):
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+
+class HostUnavailable(Exception):
+    pass
+
+def _retry_after_seconds(value):
+    # Retry-After als Sekunden oder HTTP-Datum
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (email.utils.parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+# Je Host ein Token-Bucket, der bei 429/503 die Rate halbiert und nach Erfolgen
+# langsam wieder anhebt (AIMD), plus Circuit-Breaker: nach BREAKER_FAILURES
+# Fehlern in Folge werden Anfragen sofort abgewiesen, nach BREAKER_COOLDOWN
+# darf ein einzelner Probe-Request durch.
+class HostGuard:
+    def __init__(self, host: str):
+        self.host = host
+        self.bucket = TokenBucket(HOST_RATE, HOST_BURST)
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.paused_until = 0.0
+        self._probing = False
+
+    def _set_state(self, state):
+        previous, self.state = self.state, state
+        inc("breaker_transitions_total", host=self.host, state=state)
+        if state == "open" and previous == "closed":
+            logger.warning(f"🔌 {self.host} gesperrt nach {self.failures} Fehlern, nächster Versuch in {BREAKER_COOLDOWN:.0f}s")
+            send_error_to_webhook(f"{self.host} nicht erreichbar – Anfragen pausiert")
+        elif state == "open":
+            logger.info(f"🔌 Probe-Request an {self.host} fehlgeschlagen, bleibt gesperrt")
+        elif state == "closed":
+            logger.info(f"✅ {self.host} wieder erreichbar")
+
+    async def acquire(self):
+        now = time.monotonic()
+        if self.state == "open" and now - self.opened_at >= BREAKER_COOLDOWN:
+            self._set_state("half_open")
+        if self.state == "open" or (self.state == "half_open" and self._probing):
+            inc("breaker_rejected_total", host=self.host)
+            raise HostUnavailable(f"{self.host} ist vorübergehend gesperrt")
+        wait = self.paused_until - now
+        if wait > REQUEST_TIMEOUT:
+            inc("breaker_rejected_total", host=self.host)
+            raise HostUnavailable(f"{self.host} verlangt {wait:.0f}s Pause (Retry-After)")
+        self._probing = self.state == "half_open"
+        try:
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self.bucket.acquire()
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self):
+        self._probing = False
+
+    def record_success(self):
+        self._probing = False
+        self.failures = 0
+        self.bucket.rate = min(HOST_RATE, self.bucket.rate + HOST_RATE / 10)
+        if self.state != "closed":
+            self._set_state("closed")
+
+    def record_failure(self, status=None, retry_after=None):
+        self._probing = False
+        self.failures += 1
+        now = time.monotonic()
+        if status in (429, 503):
+            inc("host_throttled_total", host=self.host, status=status)
+            self.bucket.rate = max(HOST_MIN_RATE, self.bucket.rate / 2)
+            delay = _retry_after_seconds(retry_after)
+            if delay:
+                self.paused_until = max(self.paused_until, now + delay)
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= BREAKER_FAILURES):
+            self.opened_at = now
+            self._set_state("open")
+
+
+# -------- Async HTTP --------
+HTTP_HEADERS = {"User-Agent": "Mozilla/5.0"}
+_host_limits = {}
+_host_guards = {}
+_http_session = None
+http_stats = {"requests": 0, "active": 0, "failed": 0, "connections_created": 0, "connections_reused": 0}
+
+
+async def _on_request_start(session, ctx, params):
+    http_stats["requests"] += 1
+    http_stats["active"] += 1
+
+async def _on_request_end(session, ctx, params):
+    http_stats["active"] -= 1
+
+async def _on_request_exception(session, ctx, params):
+    http_stats["active"] -= 1
+    http_stats["failed"] += 1
+
+async def _on_connection_create_end(session, ctx, params):
+    http_stats["connections_created"] += 1
+
+async def _on_connection_reuseconn(session, ctx, params):
+    http_stats["connections_reused"] += 1
+
+
+# Ein langlebiger Client für alle APIs und Scraper; gzip/deflate (und brotli,
+# falls installiert) handelt aiohttp selbst aus.
+def get_http_session() -> aiohttp.ClientSession:
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(_on_request_start)
+        trace.on_request_end.append(_on_request_end)
+        trace.on_request_exception.append(_on_request_exception)
+        trace.on_connection_create_end.append(_on_connection_create_end)
+        trace.on_connection_reuseconn.append(_on_connection_reuseconn)
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_SIZE,
+            limit_per_host=HTTP_POOL_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE,
+            ttl_dns_cache=300,
+        )
+        _http_session = aiohttp.ClientSession(
+            connector=connector,
+            headers=HTTP_HEADERS,
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            trace_configs=[trace],
+        )
+    return _http_session
+
+async def close_http_session():
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+
+def http_pool_stats() -> dict:
+    stats = dict(http_stats)
+    stats["pool_size"] = HTTP_POOL_SIZE
+    stats["pool_per_host"] = HTTP_POOL_PER_HOST
+    return stats
+
+def host_limit(url: str) -> asyncio.Semaphore:
+    # Begrenzt gleichzeitige Requests je Host
+    host = urllib.parse.urlsplit(url).hostname or ""
+    if host not in _host_limits:
+        _host_limits[host] = asyncio.Semaphore(HOST_CONCURRENCY)
+    return _host_limits[host]
+
+def host_guard(url: str) -> HostGuard:
+    host = urllib.parse.urlsplit(url).hostname or ""
+    if host not in _host_guards:
+        _host_guards[host] = HostGuard(host)
+    return _host_guards[host]
+
+def host_guard_stats() -> dict:
+    return {
+        host: {"open": int(guard.state != "closed"), "rate": round(guard.bucket.rate, 3), "failures": guard.failures}
+        for host, guard in _host_guards.items()
+    }
+
+def _request_kwargs(params, timeout):
+    # Ohne eigenes Timeout gilt das Session-Timeout (REQUEST_TIMEOUT)
+    kwargs = {"params": params}
+    if timeout:
+        kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+    return kwargs
+
+# GET mit Host-Limit, Rate-Limit und Circuit-Breaker; read() wertet die Antwort aus.
+# 429 und 5xx zählen als Fehler des Hosts, andere 4xx nicht.
+async def _guarded_get(url: str, read, headers=None, params=None, timeout=None):
+    guard = host_guard(url)
+    async with host_limit(url):
+        await guard.acquire()
+        try:
+            async with get_http_session().get(url, headers=headers, **_request_kwargs(params, timeout)) as r:
+                if r.status == 429 or r.status >= 500:
+                    guard.record_failure(r.status, r.headers.get("Retry-After"))
+                    r.raise_for_status()
+                result = await read(r)
+        except aiohttp.ClientResponseError as e:
+            if e.status == 429 or e.status >= 500:
+                guard.release()
+            else:
+                guard.record_success()
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            guard.record_failure()
+            raise
+        except BaseException:
+            guard.release()
+            raise
+        guard.record_success()
+        return result
+
+async def _read_text(r):
+    r.raise_for_status()
+    return await r.text()
+
+async def _read_json(r):
+    r.raise_for_status()
+    return await r.json(content_type=None)
+
+async def fetch_text(url: str, params=None, timeout=None) -> str:
+    return await _guarded_get(url, _read_text, params=params, timeout=timeout)
+
+async def fetch_page(url: str, etag=None, last_modified=None, timeout=None):
+    # Bedingter GET: (Status, Text, ETag, Last-Modified); bei 304 ist der Text None
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    async def read(r):
+        if r.status == 304:
+            return 304, None, etag, last_modified
+        r.raise_for_status()
+        return r.status, await r.text(), r.headers.get("ETag"), r.headers.get("Last-Modified")
+
+    return await _guarded_get(url, read, headers=headers, timeout=timeout)
+
+async def fetch_json(url: str, params=None, timeout=None) -> dict:
+    return await _guarded_get(url, _read_json, params=params, timeout=timeout)
 
 
 def highlight_keywords(text, keywords):
     for kw in sorted(keywords, key=len, reverse=True):
         text = re.sub(rf"(?i)\\b({re.escape(kw)})\\b", r"**\\1**", text)
     return text
-kununu_cache = {}
-def fetch_kununu_rating(company_name):
-    if company_name in kununu_cache:
-        return kununu_cache[company_name]
+# -------- Kununu --------
+# Ratings kommen nur aus dem Cache in jobbot.db. Fehlende oder abgelaufene
+# Einträge holt kununu_refresher() im Hintergrund nach.
+_kununu_queue = asyncio.Queue()
+_kununu_pending = set()
+_kununu_refresher_task = None
+
+def _kununu_expired(rating, fetched_at, now) -> bool:
+    return now - fetched_at > (KUNUNU_TTL if rating else KUNUNU_NEGATIVE_TTL)
+
+def queue_kununu_refresh(company_name):
+    if company_name not in _kununu_pending:
+        _kununu_pending.add(company_name)
+        _kununu_queue.put_nowait(company_name)
+
+def cached_kununu_rating(company_name):
+    now = time.time()
+    db = get_db()
+    with _db_lock, db:
+        row = db.execute("SELECT rating, fetched_at FROM kununu_cache WHERE company = ?", (company_name,)).fetchone()
+        if row:
+            db.execute("UPDATE kununu_cache SET accessed_at = ? WHERE company = ?", (now, company_name))
+    if not row or _kununu_expired(row["rating"], row["fetched_at"], now):
+        queue_kununu_refresh(company_name)
+    return row["rating"] if row else None
+
+def store_kununu_rating(company_name, rating):
+    now = time.time()
+    db = get_db()
+    with _db_lock, db:
+        db.execute(
+            "INSERT INTO kununu_cache (company, rating, fetched_at, accessed_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(company) DO UPDATE SET rating = excluded.rating, fetched_at = excluded.fetched_at",
+            (company_name, rating, now, now),
+        )
 
+def _prune_kununu_cache():
+    # LRU: nur die KUNUNU_CACHE_SIZE zuletzt genutzten Firmen behalten
+    db = get_db()
+    with _db_lock, db:
+        db.execute(
+            "DELETE FROM kununu_cache WHERE accessed_at < (SELECT accessed_at FROM kununu_cache "
+            "ORDER BY accessed_at DESC LIMIT 1 OFFSET ?)",
+            (KUNUNU_CACHE_SIZE - 1,),
+        )
+
+def _queue_stale_kununu():
+    now = time.time()
+    db = get_db()
+    with _db_lock:
+        rows = db.execute(
+            "SELECT company FROM kununu_cache WHERE (rating IS NOT NULL AND fetched_at < ?) "
+            "OR (rating IS NULL AND fetched_at < ?) ORDER BY accessed_at DESC LIMIT 100",
+            (now - KUNUNU_TTL, now - KUNUNU_NEGATIVE_TTL),
+        ).fetchall()
+    for row in rows:
+        queue_kununu_refresh(row["company"])
+
+def parse_kununu_search(html):
+    first_result = BeautifulSoup(html, HTML_PARSER).select_one("a.sc-1f9313aa-0")
+    return first_result["href"] if first_result else None
+
+def parse_kununu_score(html):
+    rating_el = BeautifulSoup(html, HTML_PARSER).select_one("span[data-test='score-box-OverallScore']")
+    return rating_el.text.strip() if rating_el else None
+
+async def fetch_kununu_rating(company_name):
+    # Liefert (gefunden, Rating); bei Netzwerkfehlern wird nichts gecacht
     try:
-        url = f"https://www.kununu.com/de/suche?term={company_name}"
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
-        soup = BeautifulSoup(response.text, "html.parser")
+        html = await fetch_text("https://www.kununu.com/de/suche", params={"term": company_name}, timeout=10)
 
         # Versuche, Link zur Unternehmensseite zu finden
-        first_result = soup.select_one("a.sc-1f9313aa-0")
-        if not first_result:
+        href = await run_blocking("parse", parse_kununu_search, html)
+        if not href:
             logger.info(f"⚠️ Kein Kununu-Treffer für {company_name}")
-            kununu_cache[company_name] = None
-            return None
+            return True, None
 
-        company_url = f"https://www.kununu.com{first_result['href']}"
-        rating_page = requests.get(company_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
-        rating_soup = BeautifulSoup(rating_page.text, "html.parser")
-        rating_el = rating_soup.select_one("span[data-test='score-box-OverallScore']")
+        company_url = f"https://www.kununu.com{href}"
+        rating_html = await fetch_text(company_url, timeout=10)
+        score = await run_blocking("parse", parse_kununu_score, rating_html)
 
-        if rating_el:
-            score = rating_el.text.strip()
-            result = f"Kununu-Rating: ⭐ {score}/5"
-            kununu_cache[company_name] = result
-            return result
+        if score:
+            return True, f"Kununu-Rating: ⭐ {score}/5"
         else:
             logger.info(f"⚠️ Kein Rating-Element für {company_name}")
-            kununu_cache[company_name] = None
-            return None
+            return True, None
+    except HostUnavailable:
+        return False, None
     except Exception as e:
         logger.warning(f"Kununu-Fehler für {company_name}: {e}")
-        return None
+        return False, None
+
+async def refresh_kununu(company_name):
+    with timed("kununu_fetch_seconds"):
+        ok, rating = await fetch_kununu_rating(company_name)
+    if ok:
+        store_kununu_rating(company_name, rating)
+    return rating
+
+async def kununu_refresher():
+    while not bot.is_closed():
+        try:
+            company_name = await asyncio.wait_for(_kununu_queue.get(), timeout=KUNUNU_REFRESH_INTERVAL)
+        except asyncio.TimeoutError:
+            _prune_kununu_cache()
+            _queue_stale_kununu()
+            continue
+        try:
+            await refresh_kununu(company_name)
+        except Exception as e:
+            logger.error(f"Fehler im Kununu-Refresher: {e}")
+        finally:
+            _kununu_pending.discard(company_name)
+
+# Holt fehlende Ratings vor dem Posten, wartet aber höchstens KUNUNU_ENRICH_TIMEOUT;
+# was bis dahin nicht da ist, landet beim Refresher.
+async def prefetch_kununu(company_names):
+    names = list(set(company_names))
+    if not names:
+        return
+    db = get_db()
+    with _db_lock:
+        marks = ",".join("?" * len(names))
+        known = {row["company"] for row in db.execute(f"SELECT company FROM kununu_cache WHERE company IN ({marks})", names)}
+    missing = [name for name in names if name not in known and name not in _kununu_pending]
+    if not missing:
+        return
+    tasks = [asyncio.create_task(refresh_kununu(name)) for name in missing]
+    _, pending = await asyncio.wait(tasks, timeout=KUNUNU_ENRICH_TIMEOUT)
+    for task in pending:
+        task.cancel()
+    for name, task in zip(missing, tasks):
+        if task in pending:
+            queue_kununu_refresh(name)
+
+def start_kununu_refresher():
+    global _kununu_refresher_task
+    if _kununu_refresher_task is None or _kununu_refresher_task.done():
+        _kununu_refresher_task = asyncio.create_task(kununu_refresher())
 
 def normalize_company_name(name: str) -> str:
     # Entfernt Zusätze wie "GmbH", "AG", "KG", "mbH" usw.
     return re.sub(r"\b(gmbh|ag|kg|mbh|inc|ltd)\b", "", name, flags=re.IGNORECASE).strip()
 
-def fetch_raw_job_text(url: str) -> str:
+# -------- Textextraktion aus Stellenseiten --------
+# Reihenfolge: JSON-LD "JobPosting" → Regeln je Domain → Hauptinhalt per Scoring.
+# Läuft direkt auf lxml (ohne BeautifulSoup-Baum) und gibt nur Blöcke aus
+# (Absätze, Listenpunkte, Überschriften), jeden Text genau einmal.
+def _by_class(name: str) -> str:
+    return f"//*[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]"
+
+def _by_id(name: str) -> str:
+    return f"//*[@id='{name}']"
+
+DOMAIN_RULES = {
+    "arbeitsagentur.de": [_by_id("detail-beschreibung-text-container"), "//*[starts-with(@id, 'detail-beschreibung')]"],
+    "honeypot.io": ["//*[@data-testid='job-description']", _by_class("job-description")],
+    "ihk-lehrstellenboerse.de": [_by_class("stellenDetail"), _by_class("detail__content")],
+    "stepstone.de": ["//*[@data-at='job-ad-content']", "//*[@data-genesis-element='CARD_CONTENT']"],
+    "indeed.com": [_by_id("jobDescriptionText")],
+    "linkedin.com": [_by_class("show-more-less-html__markup"), _by_class("description__text")],
+    "xing.com": ["//*[@data-testid='expandable-content']"],
+    "adzuna.de": [_by_class("adp-body")],
+}
+GENERIC_RULES = [_by_class("job-description"), _by_id("job-description"), "//*[@itemprop='description']", "//article"]
+
+NOISE_XPATH = "|".join(f"//{tag}" for tag in (
+    "script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside", "iframe", "button"
+))
+# Formulare fliegen nur raus, wenn sie klein sind oder vor allem aus Feldern bestehen;
+# ASP.NET-Seiten packen den ganzen Body in ein einziges <form>
+FORM_FIELDS_XPATH = ".//input[not(@type='hidden')]|.//select|.//textarea"
+XML_DECLARATION_RE = re.compile(r"^\s*<\?xml[^>]*\?>")
+BLOCK_TAGS = {"p", "li", "h1", "h2", "h3", "h4", "h5", "dt", "dd", "td", "blockquote", "pre"}
+POSITIVE_HINTS = re.compile(r"job|stelle|description|beschreibung|content|article|main|detail|body|text", re.I)
+NEGATIVE_HINTS = re.compile(r"cookie|consent|banner|footer|header|nav|menu|sidebar|share|social|related|similar|comment|newsletter|login|modal|popup|teaser|breadcrumb", re.I)
+MIN_EXTRACT_CHARS = 200
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[a-z]{2,}", re.I)
+# Hochzählen, wenn sich die Extraktion ändert: gecachte Seiten werden dann neu geparst
+PAGE_PARSER_VERSION = 2
+
+def _domain_rules(url: str) -> list:
+    host = (urllib.parse.urlsplit(url or "").hostname or "").removeprefix("www.")
+    for domain, rules in DOMAIN_RULES.items():
+        if host == domain or host.endswith("." + domain):
+            return rules
+    return []
+
+def _text(el) -> str:
+    return " ".join(" ".join(el.itertext()).split())
+
+def _block_text(node) -> str:
+    # divs zählen nur, wenn sie keine Blöcke mehr enthalten (Text mit <br> statt <p>);
+    # Blöcke in Blöcken (p in li) laufen über den äußeren, doppelte Zeilen fallen weg
+    seen = set()
+    lines = []
+    for el in node.iter():
+        tag = el.tag if isinstance(el.tag, str) else ""
+        if tag == "div":
+            if any(isinstance(child.tag, str) and (child.tag in BLOCK_TAGS or child.tag == "div") for child in el.iterdescendants()):
+                continue
+        elif tag not in BLOCK_TAGS:
+            continue
+        if any(ancestor.tag in BLOCK_TAGS for ancestor in _ancestors_within(el, node)):
+            continue
+        text = _text(el)
+        key = text.casefold()
+        if len(text) < 2 or key in seen:
+            continue
+        seen.add(key)
+        lines.append(f"• {text}" if tag == "li" else text)
+    if not lines:
+        return _text(node)
+    return "\n".join(lines)
+
+def _ancestors_within(el, node):
+    for ancestor in el.iterancestors():
+        if ancestor is node:
+            return
+        yield ancestor
+
+def _iter_json_ld(data):
+    if isinstance(data, list):
+        for item in data:
+            yield from _iter_json_ld(item)
+    elif isinstance(data, dict):
+        yield data
+        if "@graph" in data:
+            yield from _iter_json_ld(data["@graph"])
+
+def _html_fragment_text(value: str) -> str:
     try:
-        r = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
-        soup = BeautifulSoup(r.text, "html.parser")
-        candidates = soup.find_all(["p", "div", "section"])
-        raw_text = "\n".join(elem.get_text(separator=" ", strip=True) for elem in candidates)
-        return raw_text.strip()[:5000]
+        return _block_text(lxml.html.fragment_fromstring(value, create_parent="div"))
+    except Exception:
+        return value.strip()
+
+def _json_ld_posting(doc):
+    for raw in doc.xpath("//script[@type='application/ld+json']/text()"):
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            continue
+        for item in _iter_json_ld(data):
+            types = item.get("@type")
+            if "JobPosting" in (types if isinstance(types, list) else [types]):
+                return item
+    return None
+
+def _json_ld_job_text(posting) -> str:
+    parts = []
+    for key in ("description", "responsibilities", "qualifications", "skills", "jobBenefits"):
+        value = posting.get(key)
+        if isinstance(value, list):
+            value = "\n".join(str(v) for v in value)
+        if value:
+            parts.append(_html_fragment_text(str(value)))
+    company = posting.get("hiringOrganization")
+    if isinstance(company, dict) and company.get("description"):
+        parts.append(str(company["description"]))
+    return "\n".join(part for part in parts if part)
+
+def _json_ld_email(posting):
+    for key in ("applicationContact", "hiringOrganization"):
+        contact = posting.get(key)
+        if isinstance(contact, dict) and contact.get("email"):
+            return str(contact["email"]).removeprefix("mailto:")
+    return None
+
+def _class_weight(el) -> int:
+    hints = f"{el.get('class', '')} {el.get('id', '')}"
+    weight = 0
+    if POSITIVE_HINTS.search(hints):
+        weight += 25
+    if NEGATIVE_HINTS.search(hints):
+        weight -= 25
+    return weight
+
+def _best_content_node(doc):
+    # Vereinfachtes Readability-Scoring: jeder Absatz gibt Punkte an Eltern und
+    # Großeltern, linklastige Container werden abgewertet
+    scores = {}
+    for block in doc.iter("p", "li", "pre", "td"):
+        text = _text(block)
+        if len(text) < 25:
+            continue
+        points = 1 + text.count(",") + min(len(text) // 100, 3)
+        parent = block.getparent()
+        grandparent = parent.getparent() if parent is not None else None
+        for ancestor, share in ((parent, 1), (grandparent, 0.5)):
+            if ancestor is None or ancestor.tag in ("html", "body"):
+                continue
+            if ancestor not in scores:
+                scores[ancestor] = _class_weight(ancestor)
+            scores[ancestor] += points * share
+    best, best_score = None, 0
+    for node, score in scores.items():
+        text_len = len(_text(node)) or 1
+        link_len = sum(len(_text(a)) for a in node.iter("a"))
+        score *= 1 - link_len / text_len
+        if score > best_score:
+            best, best_score = node, score
+    return best
+
+def _extract_text(doc, url: str, posting) -> str:
+    text = _json_ld_job_text(posting) if posting else ""
+    if len(text) >= MIN_EXTRACT_CHARS:
+        return text
+
+    for el in doc.xpath(NOISE_XPATH):
+        el.drop_tree()
+    for form in doc.xpath("//form"):
+        chars = len(form.text_content().strip())
+        fields = len(form.xpath(FORM_FIELDS_XPATH))
+        if chars < MIN_EXTRACT_CHARS or (fields and chars / fields < 100):
+            form.drop_tree()
+    # Domain-Regeln gelten als verlässlich, generische brauchen genug Text
+    for rule in _domain_rules(url):
+        nodes = doc.xpath(rule)
+        if nodes:
+            return _block_text(nodes[0])
+    for rule in GENERIC_RULES:
+        nodes = doc.xpath(rule)
+        if nodes and len(text := _block_text(nodes[0])) >= MIN_EXTRACT_CHARS:
+            return text
+    node = _best_content_node(doc)
+    return _block_text(node if node is not None else doc)
+
+def _direct_description(doc):
+    # Seiten mit eigener Beschreibungsbox brauchen keine GPT-Zusammenfassung
+    nodes = doc.xpath(f"{_by_class('job-description')}|{_by_id('job-description')}")
+    if not nodes:
+        return None
+    return "\n".join(part.strip() for part in nodes[0].itertext() if part.strip()) or None
+
+# Ein Parse pro Seite liefert alles, was Export, Zusammenfassung und Bewerbung brauchen
+def parse_job_page(html: str, url: str = "") -> dict:
+    page = {"description": None, "text": "", "json_ld": None, "email": None}
+    try:
+        # lxml lehnt str mit Encoding-Deklaration ab (XHTML-Seiten)
+        doc = lxml.html.document_fromstring(XML_DECLARATION_RE.sub("", html, count=1))
     except Exception as e:
-        return ""
+        logger.warning(f"Stellenseite nicht parsebar ({url}): {e.__class__.__name__}: {e}")
+        return page
+
+    posting = _json_ld_posting(doc)
+    page["json_ld"] = posting
+    page["description"] = _direct_description(doc)
+    # Gekürzt wird erst nach Tokens beim Zusammenfassen; hier nur Schutz vor Riesenseiten
+    page["text"] = _extract_text(doc, url, posting).strip()[:100000]
+
+    # Kontaktadresse nur aus JSON-LD oder dem Anzeigentext, nicht aus Footer/Impressum
+    email = _json_ld_email(posting) if posting else None
+    if not email:
+        email = next((m for m in EMAIL_RE.findall(page["text"]) if "noreply" not in m and "no-reply" not in m), None)
+    page["email"] = email
+    return page
+
+# -------- Stellenseiten-Cache --------
+# Jede Stellenseite wird einmal geladen; Body (zlib) und Parse-Ergebnis liegen in
+# jobbot.db. Nach PAGE_CACHE_TTL wird per ETag/Last-Modified revalidiert.
+_page_inflight = {}
+
+def _load_page_row(url: str):
+    db = get_db()
+    with _db_lock, db:
+        row = db.execute("SELECT * FROM job_pages WHERE url = ?", (url,)).fetchone()
+        if row:
+            db.execute("UPDATE job_pages SET accessed_at = ? WHERE url = ?", (time.time(), url))
+    return row
+
+def _store_page(url: str, etag, last_modified, html: str, page: dict):
+    now = time.time()
+    db = get_db()
+    with _db_lock, db:
+        db.execute(
+            "INSERT OR REPLACE INTO job_pages (url, etag, last_modified, body, parser_version, artefacts, fetched_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, zlib.compress(html.encode()), PAGE_PARSER_VERSION, json.dumps(page), now, now),
+        )
+        db.execute(
+            "DELETE FROM job_pages WHERE accessed_at < (SELECT accessed_at FROM job_pages "
+            "ORDER BY accessed_at DESC LIMIT 1 OFFSET ?)",
+            (PAGE_CACHE_SIZE - 1,),
+        )
 
-from openai import OpenAI
+def _touch_page(url: str):
+    db = get_db()
+    with _db_lock, db:
+        db.execute("UPDATE job_pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
 
-client = OpenAI()  # lädt automatisch den Key aus OPENAI_API_KEY
+async def _load_job_page(url: str) -> dict:
+    row = _load_page_row(url)
+    page = json.loads(row["artefacts"]) if row and row["parser_version"] == PAGE_PARSER_VERSION else None
+    if page is not None and time.time() - row["fetched_at"] < PAGE_CACHE_TTL:
+        inc("job_page_cache_total", result="hit")
+        return page
 
-def summarize_with_gpt(text: str) -> str:
-    if not text:
-        return "Keine Beschreibung gefunden."
     try:
-        response = client.chat.completions.create(
-            model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-            messages=[
-                {"role": "system", "content": (
-                    "Analysiere die folgende Jobanzeige und gib eine strukturierte Zusammenfassung aus.\n"
-                    "Fasse die folgenden drei Punkte möglichst prägnant zusammen:\n\n"
-                    "1. Welche Aufgaben/Tätigkeiten sind gefordert?\n"
-                    "2. Welche Qualifikationen oder Anforderungen werden erwartet?\n"
-                    "3. Was lässt sich über das Unternehmen sagen (wenn Infos vorhanden sind)?\n\n"
-                    "Gib die Antwort als gegliederte Liste mit kurzen, verständlichen Sätzen aus."
-                )},
-                {"role": "user", "content": text}
-            ],
-            temperature=0.4,
-            max_tokens=350
+        with timed("job_page_fetch_seconds"):
+            status, html, etag, last_modified = await fetch_page(
+                url, row["etag"] if row else None, row["last_modified"] if row else None, timeout=10
+            )
+    except Exception:
+        if page is None:
+            raise
+        # Lieber eine ältere Fassung als gar keine
+        inc("job_page_cache_total", result="stale")
+        return page
+
+    if status == 304:
+        inc("job_page_cache_total", result="revalidated")
+        if page is not None:
+            _touch_page(url)
+            return page
+        # Parser hat sich geändert: gespeicherten Body neu auswerten statt neu laden
+        html = zlib.decompress(row["body"]).decode()
+    else:
+        inc("job_page_cache_total", result="miss")
+
+    page = await run_blocking("parse", parse_job_page, html, url)
+    _store_page(url, etag, last_modified, html, page)
+    return page
+
+async def fetch_job_page(url: str) -> dict:
+    # Gleichzeitige Anfragen für dieselbe URL teilen sich einen Download
+    task = _page_inflight.get(url)
+    if task is None:
+        task = asyncio.create_task(_load_job_page(url))
+        _page_inflight[url] = task
+        task.add_done_callback(lambda _: _page_inflight.pop(url, None))
+    return await asyncio.shield(task)
+
+async def summary_source_text(url: str) -> str:
+    # Text, den job_description() an GPT geben würde; leer, wenn die Seite eine
+    # direkte Beschreibung hat und keine Zusammenfassung braucht
+    try:
+        page = await fetch_job_page(url)
+    except Exception:
+        return ""
+    return "" if page["description"] else page["text"]
+
+# -------- OpenAI --------
+SUMMARY_PROMPT = (
+    "Analysiere die folgende Jobanzeige und gib eine strukturierte Zusammenfassung aus.\n"
+    "Fasse die folgenden drei Punkte möglichst prägnant zusammen:\n\n"
+    "1. Welche Aufgaben/Tätigkeiten sind gefordert?\n"
+    "2. Welche Qualifikationen oder Anforderungen werden erwartet?\n"
+    "3. Was lässt sich über das Unternehmen sagen (wenn Infos vorhanden sind)?\n\n"
+    "Gib die Antwort als gegliederte Liste mit kurzen, verständlichen Sätzen aus."
+)
+# Ändert sich der Prompt, ändern sich automatisch alle Cache-Schlüssel
+SUMMARY_PROMPT_VERSION = hashlib.sha256(SUMMARY_PROMPT.encode()).hexdigest()[:12]
+SUMMARY_MAX_TOKENS = 350
+
+_openai_client = None
+_gpt_tokens = TokenBucket(GPT_TOKENS_PER_MINUTE / 60, GPT_TOKENS_PER_MINUTE)
+_encodings = {}
+
+def get_openai_client() -> AsyncOpenAI:
+    # lädt automatisch den Key aus OPENAI_API_KEY; Wiederholungen macht gpt_request selbst
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = AsyncOpenAI(timeout=GPT_DEADLINE, max_retries=0)
+    return _openai_client
+
+def summary_model() -> str:
+    return os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding("o200k_base")
+    return _encodings[model]
+
+def estimate_tokens(text: str, model: str = None) -> int:
+    encoding = _encoding(model or summary_model())
+    if encoding is None:
+        return len(text) // 4 + 1  # grobe Schätzung ohne tiktoken
+    return len(encoding.encode(text, disallowed_special=()))
+
+def truncate_tokens(text: str, max_tokens: int, model: str = None) -> str:
+    encoding = _encoding(model or summary_model())
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+def _retry_delay(error, attempt: int) -> float:
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return min(30.0, 2 ** attempt) + random.uniform(0, 1)
+
+def _retryable(error) -> bool:
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+# Ein Chat-Request mit Frist, TPM-Limit und exponentiellem Backoff. Mit on_delta
+# wird gestreamt und der bisherige Text nach jedem Teilstück übergeben. on_delta
+# ist synchron und nur Fortschrittsanzeige: Fehler darin brechen den Stream nicht ab.
+async def gpt_request(messages, model: str, max_tokens: int, on_delta=None, **kwargs) -> str:
+    cost = sum(estimate_tokens(m["content"], model) for m in messages) + max_tokens
+    for attempt in range(GPT_MAX_RETRIES + 1):
+        await _gpt_tokens.acquire(min(cost, _gpt_tokens.capacity))
+        try:
+            async with asyncio.timeout(GPT_DEADLINE):
+                with timed("gpt_request_seconds", model=model):
+                    if on_delta is None:
+                        response = await get_openai_client().chat.completions.create(
+                            model=model, messages=messages, temperature=0.4, max_tokens=max_tokens, **kwargs
+                        )
+                        return response.choices[0].message.content.strip()
+
+                    parts = []
+                    stream = await get_openai_client().chat.completions.create(
+                        model=model, messages=messages, temperature=0.4, max_tokens=max_tokens, stream=True, **kwargs
+                    )
+                    async for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            parts.append(chunk.choices[0].delta.content)
+                            try:
+                                on_delta("".join(parts))
+                            except Exception as e:
+                                logger.warning(f"Fortschrittsanzeige fehlgeschlagen: {e}")
+                    return "".join(parts).strip()
+        except Exception as e:
+            if attempt >= GPT_MAX_RETRIES or not _retryable(e):
+                raise
+            delay = _retry_delay(e, attempt)
+            inc("gpt_retries_total", model=model)
+            logger.warning(f"OpenAI-Fehler ({e.__class__.__name__}), neuer Versuch in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+async def request_gpt_summary(text: str, model: str, on_delta=None) -> str:
+    messages = [
+        {"role": "system", "content": SUMMARY_PROMPT},
+        {"role": "user", "content": truncate_tokens(text, GPT_INPUT_TOKENS, model)}
+    ]
+    return await gpt_request(messages, model, SUMMARY_MAX_TOKENS, on_delta=on_delta)
+
+
+# -------- Zusammenfassungs-Cache --------
+# Schlüssel = Hash aus normalisiertem Seitentext, Modell und Prompt-Version.
+# Gleichzeitige Anfragen mit demselben Schlüssel teilen sich einen API-Call.
+_summary_inflight = {}
+
+def normalize_summary_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+def summary_cache_key(text: str, model: str) -> str:
+    return hashlib.sha256(f"{SUMMARY_PROMPT_VERSION}\0{model}\0{text}".encode()).hexdigest()
+
+def load_cached_summary(key: str):
+    db = get_db()
+    with _db_lock, db:
+        row = db.execute("SELECT summary, created FROM gpt_summaries WHERE key = ?", (key,)).fetchone()
+        if not row or time.time() - row["created"] > GPT_CACHE_TTL:
+            return None
+        db.execute("UPDATE gpt_summaries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+    return row["summary"]
+
+def store_summary(key: str, model: str, summary: str):
+    now = time.time()
+    db = get_db()
+    with _db_lock, db:
+        db.execute("INSERT OR REPLACE INTO gpt_summaries (key, model, summary, created, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                   (key, model, summary, now, now))
+        db.execute("DELETE FROM gpt_summaries WHERE created < ?", (now - GPT_CACHE_TTL,))
+        db.execute(
+            "DELETE FROM gpt_summaries WHERE accessed_at < (SELECT accessed_at FROM gpt_summaries "
+            "ORDER BY accessed_at DESC LIMIT 1 OFFSET ?)",
+            (GPT_CACHE_SIZE - 1,),
         )
-        return response.choices[0].message.content.strip()
+
+async def _summarize_and_store(key: str, text: str, model: str, on_delta=None) -> str:
+    try:
+        summary = await request_gpt_summary(text, model, on_delta)
     except Exception as e:
+        # Fehler nicht cachen, der nächste Export versucht es erneut
         return f"Zusammenfassung fehlgeschlagen:\n{e}"
+    store_summary(key, model, summary)
+    return summary
 
+async def cached_summary(text: str, on_delta=None) -> str:
+    text = normalize_summary_text(text or "")
+    if not text:
+        return "Keine Beschreibung gefunden."
+    model = summary_model()
+    key = summary_cache_key(text, model)
+
+    cached = load_cached_summary(key)
+    if cached is not None:
+        inc("gpt_summary_cache_total", result="hit")
+        return cached
+    if key in _summary_inflight:
+        inc("gpt_summary_cache_total", result="coalesced")
+        return await asyncio.shield(_summary_inflight[key])
+
+    inc("gpt_summary_cache_total", result="miss")
+    task = asyncio.create_task(_summarize_and_store(key, text, model, on_delta))
+    _summary_inflight[key] = task
+    task.add_done_callback(lambda _: _summary_inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+# -------- Vorab-Zusammenfassung --------
+BATCH_SUMMARY_PROMPT = (
+    SUMMARY_PROMPT + "\n\n"
+    "Du erhältst mehrere Jobanzeigen, jeweils eingeleitet mit '### Anzeige <Nummer>'. "
+    "Fasse jede Anzeige einzeln zusammen und antworte ausschließlich mit einem JSON-Objekt "
+    "der Form {\"summaries\": [\"...\", ...]} in derselben Reihenfolge wie die Anzeigen."
+)
 
-def generate_job_pdf(job):
+async def request_gpt_batch(texts: list, model: str) -> list:
+    content = "\n\n".join(
+        f"### Anzeige {i}\n{truncate_tokens(text, GPT_INPUT_TOKENS, model)}" for i, text in enumerate(texts, start=1)
+    )
+    messages = [
+        {"role": "system", "content": BATCH_SUMMARY_PROMPT},
+        {"role": "user", "content": content}
+    ]
+    answer = await gpt_request(messages, model, SUMMARY_MAX_TOKENS * len(texts), response_format={"type": "json_object"})
+    summaries = json.loads(answer).get("summaries", [])
+    if len(summaries) != len(texts):
+        raise ValueError(f"{len(summaries)} statt {len(texts)} Zusammenfassungen erhalten")
+    return [str(summary).strip() for summary in summaries]
+
+def _pack_batches(items):
+    batches, batch, tokens = [], [], 0
+    for item in items:
+        cost = min(estimate_tokens(item[1]), GPT_INPUT_TOKENS)
+        if batch and (len(batch) >= SUMMARY_BATCH_SIZE or tokens + cost > SUMMARY_BATCH_INPUT_TOKENS):
+            batches.append(batch)
+            batch, tokens = [], 0
+        batch.append(item)
+        tokens += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+# Fasst neu gefundene Jobs gebündelt zusammen und legt die Ergebnisse unter
+# denselben Schlüsseln wie cached_summary() ab, damit der PDF-Export sofort trifft.
+async def presummarize_jobs(jobs):
+    model = summary_model()
+    texts = await asyncio.gather(*(summary_source_text(job["url"]) for job in jobs))
+
+    items, keys, budget = [], set(), SUMMARY_TOKEN_BUDGET
+    for text in texts:
+        text = normalize_summary_text(text)
+        if not text:
+            continue
+        key = summary_cache_key(text, model)
+        if key in keys or load_cached_summary(key) is not None:
+            continue
+        budget -= min(estimate_tokens(text, model), GPT_INPUT_TOKENS)
+        if budget < 0:
+            logger.info("💸 Token-Budget für Vorab-Zusammenfassungen erschöpft.")
+            break
+        keys.add(key)
+        items.append((key, text))
+
+    limit = asyncio.Semaphore(SUMMARY_BATCH_CONCURRENCY)
+
+    async def run_batch(batch):
+        async with limit:
+            try:
+                summaries = await request_gpt_batch([text for _, text in batch], model)
+            except Exception as e:
+                logger.warning(f"Batch-Zusammenfassung fehlgeschlagen ({len(batch)} Jobs): {e}")
+                return 0
+        for (key, _), summary in zip(batch, summaries):
+            store_summary(key, model, summary)
+        return len(batch)
+
+    done = await asyncio.gather(*(run_batch(batch) for batch in _pack_batches(items)))
+    if items:
+        logger.info(f"🧠 {sum(done)}/{len(items)} Jobs vorab zusammengefasst.")
+        inc("gpt_presummarized_total", sum(done))
+
+
+# -------- PDF-Rendering --------
+# Gerendert wird im "pdf"-Prozesspool. Der Dateiname enthält einen Hash über den
+# Inhalt: gibt es das PDF schon, wird es ohne Renderlauf wiederverwendet.
+_template_cache = {}
+
+def load_cover_letter_template(path: str = COVER_LETTER_TEMPLATE):
+    # Je Prozess einmal geparst, neu gelesen nur bei geänderter Datei
+    mtime = os.stat(path).st_mtime_ns
+    cached = _template_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        paragraphs = f.read().strip().split("\n\n")
+    template = (paragraphs[0], [paragraph.split("\n") for paragraph in paragraphs[1:]])
+    _template_cache[path] = (mtime, template)
+    return template
+
+def _pdf_slug(text: str) -> str:
+    return re.sub(r"[^\w-]+", "_", text).strip("_")[:60] or "job"
+
+def pdf_cache_path(prefix: str, name: str, *content) -> Path:
+    digest = hashlib.sha256(json.dumps(content, ensure_ascii=False, default=str).encode()).hexdigest()[:10]
+    return PDF_DIR / f"{prefix}_{_pdf_slug(name)}_{digest}.pdf"
+
+def attachment_name(path) -> str:
+    # Für Anhänge ohne den Inhalts-Hash im Dateinamen
+    return re.sub(r"_[0-9a-f]{10}(?=\.\w+$)", "", os.path.basename(path))
+
+def _cached_pdf(path: Path, kind: str):
+    if path.exists():
+        os.utime(path)  # zählt fürs Aufräumen als zuletzt genutzt
+        inc("pdf_render_cache_total", kind=kind, result="hit")
+        return str(path)
+    inc("pdf_render_cache_total", kind=kind, result="miss")
+    return None
+
+def cleanup_pdf_dir(keep=None):
+    # Älteste PDFs löschen, bis das Verzeichnis wieder unter PDF_DIR_MAX_MB liegt;
+    # das gerade geschriebene (keep) bleibt in jedem Fall
     try:
-        # Versuche, direkt Beschreibung zu finden
-        response = requests.get(job["url"], headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
-        soup = BeautifulSoup(response.text, "html.parser")
-        desc = soup.select_one(".job-description") or soup.select_one("#job-description")
+        entries = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in os.scandir(PDF_DIR) if e.is_file()]
+    except FileNotFoundError:
+        return
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= PDF_DIR_MAX_MB * 1024 * 1024:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except FileNotFoundError:
+            pass
+
+def _write_pdf(pdf, path: Path) -> str:
+    # Erst temporär schreiben, damit nie ein halbes PDF im Cache liegt
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    pdf.output(str(tmp_path))
+    os.replace(tmp_path, path)
+    cleanup_pdf_dir(keep=str(path))
+    return str(path)
+
+def render_cover_letter(job_title, sender_name, path):
+    title, paragraphs = load_cover_letter_template()
+
+    def fill(text):
+        return text.replace("{{job_title}}", job_title).replace("{{sender_name}}", sender_name)
 
-        if desc:
-            description = desc.get_text("\n", strip=True)
-        else:
-            raw_text = fetch_raw_job_text(job["url"])
-            description = summarize_with_gpt(raw_text)
+    pdf = FPDF()
+    pdf.add_page()
 
-    except Exception as e:
-        description = f"Fehler beim Abrufen: {e}"
+    # Title bold, size 11
+    pdf.set_font("Arial", style="B", size=11)
+    pdf.multi_cell(0, 6, fill(title))
+    pdf.ln(4)
 
-    # Speichere PDF unter /opt/discord-jobbot/saved_pdfs/
-    output_dir = Path("/opt/discord-jobbot/saved_pdfs")
-    output_dir.mkdir(parents=True, exist_ok=True)
-    pdf_path = output_dir / f"{job['id']}_export.pdf"
+    # Body regular, size 11
+    pdf.set_font("Arial", size=11)
+    for lines in paragraphs:
+        for line in lines:
+            pdf.multi_cell(0, 6, fill(line))
+        pdf.ln(4)
 
-    # PDF-Erstellung
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
+    return _write_pdf(pdf, Path(path))
+
+def _latin1(text) -> str:
+    # FPDF-Standardschriften können nur Latin-1; alles andere wird zu "?"
+    return str(text).encode("latin-1", "replace").decode("latin-1")
+
+def _add_job_page(pdf, job, description):
     pdf.add_page()
     pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, job["title"], ln=True)
+    pdf.cell(0, 10, _latin1(job["title"]), ln=True)
     pdf.set_font("Arial", size=12)
-    pdf.cell(0, 10, f"Unternehmen: {job.get('company', 'Unbekannt')}", ln=True)
-    pdf.cell(0, 10, f"Ort: {job.get('location', 'Unbekannt')}", ln=True)
-    pdf.multi_cell(0, 8, f"\nLink: {job['url']}\n\nBeschreibung:\n{description}")
+    pdf.cell(0, 10, _latin1(f"Unternehmen: {job.get('company', 'Unbekannt')}"), ln=True)
+    pdf.cell(0, 10, _latin1(f"Ort: {job.get('location', 'Unbekannt')}"), ln=True)
+    pdf.multi_cell(0, 8, _latin1(f"\nLink: {job['url']}\n\nBeschreibung:\n{description}"))
 
-    pdf.output(str(pdf_path))
-    return str(pdf_path)
+def render_job_pdf(job, description, path):
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    _add_job_page(pdf, job, description)
+    return _write_pdf(pdf, Path(path))
 
+def render_favorites_pdf(items, path):
+    # Alle Favoriten in einem Dokument, eine Seite (oder mehr) je Job
     pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, job["title"], ln=True)
-    pdf.set_font("Arial", size=12)
-    pdf.cell(0, 10, f"Unternehmen: {job.get('company', 'Unbekannt')}", ln=True)
-    pdf.cell(0, 10, f"Ort: {job.get('location', 'Unbekannt')}", ln=True)
-    pdf.multi_cell(0, 8, f"\nLink: {job['url']}\n\nBeschreibung:\n{description}")
+    pdf.set_auto_page_break(auto=True, margin=15)
+    for job, description in items:
+        _add_job_page(pdf, job, description)
+    return _write_pdf(pdf, Path(path))
+
+def build_pdf_zip(pdf_paths, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for number, pdf_path in enumerate(pdf_paths, start=1):
+            # Bei knappem PDF_DIR_MAX_MB kann ein Einzel-PDF schon wieder weg sein
+            if os.path.exists(pdf_path):
+                archive.write(pdf_path, f"{number:03d}_{attachment_name(pdf_path)}")
+    os.replace(tmp_path, path)
+    cleanup_pdf_dir(keep=str(path))
+    return str(path)
+
+async def generate_cover_letter(job_title):
+    sender_name = os.getenv("SENDER_NAME", "Max Mustermann")
+    try:
+        template = os.stat(COVER_LETTER_TEMPLATE)
+        path = pdf_cache_path("anschreiben", job_title, job_title, sender_name, template.st_mtime_ns, template.st_size)
+        cached = _cached_pdf(path, "anschreiben")
+        if cached:
+            return cached
+        with timed("pdf_render_seconds", kind="anschreiben"):
+            return await run_blocking("pdf", render_cover_letter, job_title, sender_name, str(path))
+    except Exception as e:
+        logger.error(f"Fehler beim Generieren des PDFs: {e}")
+        return None
+
+async def job_description(job, on_delta=None):
+    try:
+        # Versuche, direkt Beschreibung zu finden, sonst GPT über den Anzeigentext
+        page = await fetch_job_page(job["url"])
+        description = page["description"]
+
+        if not description:
+            description = await cached_summary(page["text"], on_delta)
 
-    pdf_path = f"/opt/discord-jobbot/saved_pdfs/{job['id']}_export.pdf"
-    pdf.output(pdf_path)
-    return pdf_path
+    except Exception as e:
+        description = f"Fehler beim Abrufen: {e}"
+    return description
+
+def _job_fields(job):
+    return [job["title"], job.get("company", "Unbekannt"), job.get("location", "Unbekannt"), job["url"]]
+
+async def generate_job_pdf(job, on_delta=None):
+    description = await job_description(job, on_delta)
+
+    path = pdf_cache_path("export", str(job["id"]), *_job_fields(job), description)
+    cached = _cached_pdf(path, "export")
+    if cached:
+        return cached
+    with timed("pdf_render_seconds", kind="export"):
+        return await run_blocking("pdf", render_job_pdf, job, description, str(path))
+
+# Sammel-Export: Seitenabrufe, Zusammenfassungen und Einzel-PDFs laufen parallel
+# (höchstens EXPORT_CONCURRENCY Jobs gleichzeitig), am Ende entsteht ein PDF oder ZIP
+async def build_favorites_export(jobs, fmt: str, on_progress=None):
+    limit = asyncio.Semaphore(EXPORT_CONCURRENCY)
+    done = 0
+
+    async def export_one(job):
+        nonlocal done
+        async with limit:
+            try:
+                return await (generate_job_pdf(job) if fmt == "zip" else job_description(job))
+            except Exception as e:
+                logger.error(f"Export von Job {job.get('id')} fehlgeschlagen: {e}")
+                return None
+            finally:
+                done += 1
+                if on_progress:
+                    on_progress(done)
+
+    results = await asyncio.gather(*(export_one(job) for job in jobs))
+
+    if fmt == "zip":
+        pdf_paths = [path for path in results if path]
+        path = pdf_cache_path("favoriten", "export", *pdf_paths).with_suffix(".zip")
+        cached = _cached_pdf(path, "favoriten_zip")
+        if cached:
+            return cached
+        with timed("pdf_render_seconds", kind="favoriten_zip"):
+            return await run_blocking("pdf", build_pdf_zip, pdf_paths, str(path))
+
+    items = [(job, description) for job, description in zip(jobs, results) if description is not None]
+    path = pdf_cache_path("favoriten", "export", *[(_job_fields(job), description) for job, description in items])
+    cached = _cached_pdf(path, "favoriten_pdf")
+    if cached:
+        return cached
+    with timed("pdf_render_seconds", kind="favoriten_pdf"):
+        return await run_blocking("pdf", render_favorites_pdf, items, str(path))
+
+# -------- Bewerbungsanhänge --------
+# Lebenslauf und Zeugnisse liegen einmal als bytes im Speicher; vor jeder Nutzung
+# prüft ein stat(), ob sich die Datei geändert hat. Mail und Discord-Upload
+# bekommen denselben Puffer (BytesIO kopiert unveränderte bytes nicht).
+_attachment_cache = {}
+_attachment_lock = threading.Lock()
+
+def read_attachment(path: str):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _attachment_lock:
+        cached = _attachment_cache.get(path)
+        if cached and cached[0] == version:
+            return cached[1]
+        with open(path, "rb") as f:
+            data = f.read()
+        # Anschreiben sind schon im PDF-Cache, nur feste Anhänge im Speicher halten
+        if path in APPLICATION_FILES:
+            _attachment_cache[path] = (version, data)
+            inc("attachment_loads_total")
+        return data
+
+def application_attachments(cover_letter=None) -> list:
+    # [(Pfad, Dateiname, Inhalt oder None wenn die Datei fehlt)]
+    paths = APPLICATION_FILES + ([cover_letter] if cover_letter else [])
+    return [(path, attachment_name(path), read_attachment(path)) for path in paths]
+
+# -------- E-Mail-Outbox --------
+# Bewerbungen landen in der Tabelle outbox; outbox_worker() verschickt sie über eine
+# wiederverwendete SMTP-Verbindung (aiosmtplib) und versucht es bei Fehlern mit
+# wachsendem Abstand erneut. Offene Mails überstehen so auch einen Neustart.
+_outbox_wakeup = asyncio.Event()
+_outbox_waiters = {}
+_outbox_task = None
+_smtp = None
+_smtp_last_used = 0.0
+
+def enqueue_application_email(to_address, job_title) -> int:
+    now = time.time()
+    db = get_db()
+    with _db_lock, db:
+        cursor = db.execute(
+            "INSERT INTO outbox (to_address, job_title, status, next_attempt, created) VALUES (?, ?, 'queued', ?, ?)",
+            (to_address, job_title, now, now),
+        )
+    _outbox_wakeup.set()
+    inc("outbox_total", result="queued")
+    return cursor.lastrowid
+
+async def wait_for_delivery(mail_id: int, timeout: float = 600):
+    # Liefert ("sent"|"failed", Fehler) oder None, wenn bis dahin noch zugestellt wird
+    future = _outbox_waiters.setdefault(mail_id, asyncio.get_running_loop().create_future())
+    # Der Worker kann schon vor dem Warten fertig gewesen sein
+    db = get_db()
+    with _db_lock:
+        row = db.execute("SELECT status, last_error FROM outbox WHERE id = ?", (mail_id,)).fetchone()
+    if row and row["status"] in ("sent", "failed"):
+        _outbox_waiters.pop(mail_id, None)
+        return row["status"], row["last_error"]
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+    except asyncio.TimeoutError:
+        _outbox_waiters.pop(mail_id, None)
+        return None
+
+def _finish_outbox(mail_id: int, status: str, error=None):
+    db = get_db()
+    with _db_lock, db:
+        db.execute("UPDATE outbox SET status = ?, last_error = ?, sent_at = ? WHERE id = ?",
+                   (status, error, time.time() if status == "sent" else None, mail_id))
+    inc("outbox_total", result=status)
+    future = _outbox_waiters.pop(mail_id, None)
+    if future is not None and not future.done():
+        future.set_result((status, error))
+
+def _retry_outbox(mail_id: int, attempts: int, error: str):
+    delay = min(900, 30 * 2 ** (attempts - 1)) + random.uniform(0, 5)
+    db = get_db()
+    with _db_lock, db:
+        db.execute("UPDATE outbox SET status = 'queued', attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                   (attempts, time.time() + delay, error, mail_id))
+    inc("outbox_total", result="retry")
+    logger.warning(f"E-Mail #{mail_id} nicht zugestellt ({error}), neuer Versuch in {delay:.0f}s")
+
+async def _smtp_connection():
+    global _smtp
+    if _smtp is not None and _smtp.is_connected:
+        return _smtp
+    smtp = aiosmtplib.SMTP(
+        hostname=os.getenv("SMTP_HOST"),
+        port=int(os.getenv("SMTP_PORT", 587)),
+        start_tls=SMTP_STARTTLS,
+        timeout=REQUEST_TIMEOUT,
+    )
+    await smtp.connect()
+    if os.getenv("SMTP_USER"):
+        await smtp.login(os.getenv("SMTP_USER"), os.getenv("SMTP_PASSWORD"))
+    inc("smtp_connections_total")
+    _smtp = smtp
+    return smtp
+
+async def close_smtp():
+    global _smtp
+    if _smtp is not None:
+        smtp, _smtp = _smtp, None
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+async def _deliver(row):
+    global _smtp_last_used
+    cover_letter = await generate_cover_letter(row["job_title"])
+    msg = await run_blocking("net", build_application_email, row["to_address"], row["job_title"], cover_letter)
+    # Hat der Server die ruhende Verbindung gekappt, einmal sofort neu verbinden
+    for attempt in range(2):
+        smtp = await _smtp_connection()
+        try:
+            with timed("smtp_send_seconds"):
+                await smtp.send_message(msg)
+            _smtp_last_used = time.monotonic()
+            return
+        except aiosmtplib.SMTPServerDisconnected:
+            await close_smtp()
+            if attempt:
+                raise
+
+async def _process_outbox_row(row):
+    db = get_db()
+    with _db_lock, db:
+        db.execute("UPDATE outbox SET status = 'sending' WHERE id = ?", (row["id"],))
+    try:
+        await _deliver(row)
+    except Exception as e:
+        error = f"{e.__class__.__name__}: {e}"
+        attempts = row["attempts"] + 1
+        # 5xx (Empfänger abgelehnt, Login falsch) und kaputte Mails werden durch
+        # Wiederholen nicht besser, Netz- und 4xx-Fehler (Greylisting 450/451) schon
+        if isinstance(e, aiosmtplib.SMTPRecipientsRefused):
+            permanent = any(refused.code >= 500 for refused in e.recipients)
+        else:
+            permanent = (isinstance(e, aiosmtplib.SMTPResponseException) and e.code >= 500) or not isinstance(
+                e, (aiosmtplib.SMTPException, OSError, asyncio.TimeoutError)
+            )
+        if not isinstance(e, aiosmtplib.SMTPResponseException):
+            await close_smtp()
+        if permanent or attempts >= SMTP_MAX_ATTEMPTS:
+            logger.error(f"E-Mail-Sendeproblem: {error}")
+            _finish_outbox(row["id"], "failed", error)
+        else:
+            _retry_outbox(row["id"], attempts, error)
+        return
+    logger.info(f"📧 Bewerbung an {row['to_address']} gesendet.")
+    _finish_outbox(row["id"], "sent")
+
+def _due_outbox_rows():
+    db = get_db()
+    with _db_lock:
+        return db.execute(
+            "SELECT * FROM outbox WHERE status = 'queued' AND next_attempt <= ? ORDER BY next_attempt",
+            (time.time(),),
+        ).fetchall()
+
+def _next_outbox_delay():
+    db = get_db()
+    with _db_lock:
+        row = db.execute("SELECT MIN(next_attempt) AS next FROM outbox WHERE status = 'queued'").fetchone()
+    return None if row["next"] is None else max(0.0, row["next"] - time.time())
+
+async def outbox_worker():
+    # Nach einem Absturz hängengebliebene Mails neu einreihen, Altes aufräumen
+    db = get_db()
+    with _db_lock, db:
+        db.execute("UPDATE outbox SET status = 'queued' WHERE status = 'sending'")
+        db.execute("DELETE FROM outbox WHERE status IN ('sent', 'failed') AND created < ?", (time.time() - 30 * 86400,))
+
+    while True:
+        _outbox_wakeup.clear()
+        for row in _due_outbox_rows():
+            await _process_outbox_row(row)
+
+        delay = _next_outbox_delay()
+        try:
+            await asyncio.wait_for(_outbox_wakeup.wait(), timeout=min(delay, SMTP_IDLE_TIMEOUT) if delay is not None else SMTP_IDLE_TIMEOUT)
+        except asyncio.TimeoutError:
+            if _smtp is not None and time.monotonic() - _smtp_last_used >= SMTP_IDLE_TIMEOUT:
+                await close_smtp()
+
+def start_outbox_worker():
+    global _outbox_task
+    if _outbox_task is None or _outbox_task.done():
+        _outbox_task = asyncio.create_task(outbox_worker())
+
+async def report_delivery(interaction: discord.Interaction, mail_id: int, label: str):
+    result = await wait_for_delivery(mail_id)
+    if result is None:
+        message = f"⏳ {label} ist noch nicht zugestellt, es wird weiter versucht."
+    elif result[0] == "sent":
+        message = f"✅ {label} gesendet."
+    else:
+        message = f"❌ Fehler beim Versand: {result[1]}"
+    await interaction.followup.send(message, ephemeral=True)
 
 # -------- Discord UI Buttons --------
 
@@ -365,8 +2489,10 @@ class FavoriteActionsView(View):
             view = self.view  # type: FavoriteActionsView
             job = view.job
             email = job.get("email")
+            # PDF-Pool kann belegt sein oder erst starten: Interaktion sofort offen halten
+            await interaction.response.defer(ephemeral=True)
 
-            pdf_path = generate_dynamic_pdf(job["title"])
+            pdf_path = await generate_cover_letter(job["title"])
 
             files = []
             summary = f"📄 **Bewerbungsvorschau**\n\n"
@@ -375,25 +2501,23 @@ class FavoriteActionsView(View):
             summary += f"**Empfänger:** {email}\n"
             summary += f"**Dateien:**\n"
 
-            for fname in ["lebenslauf.pdf", "zeugnisse.pdf", pdf_path]:
-                if fname and os.path.exists(fname):
-                    summary += f"- 📎 {fname}\n"
-                    with open(fname, "rb") as f:
-                        discord_file = discord.File(f, filename=os.path.basename(fname))
-                        files.append(discord_file)
+            for path, filename, data in await run_blocking("net", application_attachments, pdf_path):
+                if data is not None:
+                    summary += f"- 📎 {filename}\n"
+                    files.append(discord.File(io.BytesIO(data), filename=filename))
                 else:
-                    summary += f"- ⚠️ {fname} nicht gefunden\n"
+                    summary += f"- ⚠️ {path} nicht gefunden\n"
+            if not pdf_path:
+                summary += "- ⚠️ Anschreiben konnte nicht erstellt werden\n"
 
             class FinalSendView(View):
                 @discord.ui.button(label="📤 Final senden", style=discord.ButtonStyle.green)
                 async def confirm_send(self, confirm_interaction: discord.Interaction, button: Button):
-                    success = send_application_email(email, job["title"])
-                    if success:
-                        await confirm_interaction.response.send_message("✅ Bewerbung gesendet.", ephemeral=True)
-                    else:
-                        await confirm_interaction.response.send_message("❌ Fehler beim Versand.", ephemeral=True)
+                    mail_id = enqueue_application_email(email, job["title"])
+                    await confirm_interaction.response.send_message("📨 Bewerbung eingereiht, Zustellung läuft …", ephemeral=True)
+                    await report_delivery(confirm_interaction, mail_id, "Bewerbung")
 
-            await interaction.response.send_message(content=summary, files=files, view=FinalSendView(), ephemeral=True)
+            await interaction.followup.send(content=summary, files=files, view=FinalSendView(), ephemeral=True)
 
     class RemoveButton(Button):
         def __init__(self):
@@ -401,10 +2525,7 @@ class FavoriteActionsView(View):
 
         async def callback(self, interaction: discord.Interaction):
             view = self.view  # type: FavoriteActionsView
-            jobs = load_saved_jobs()
-            jobs = [j for j in jobs if j.get("id") != view.job.get("id")]
-            with open(SAVED_JOBS_FILE, "w") as f:
-                json.dump(jobs, f, indent=2)
+            remove_saved_job(view.job.get("id"))
             await interaction.response.send_message("🗑️ Job entfernt.", ephemeral=True)
     class ExportPdfButton(Button):
         def __init__(self):
@@ -414,11 +2535,31 @@ class FavoriteActionsView(View):
             await interaction.response.defer(ephemeral=True)  # sofortige Antwort, hält Interaktion offen
 
             job = self.view.job
-            path = generate_job_pdf(job)
+            progress = await interaction.followup.send("⏳ Export wird erstellt …", ephemeral=True, wait=True)
+            last_edit = 0.0
+            pending_edit = None
+
+            async def edit_progress(text):
+                try:
+                    await progress.edit(content=f"📝 Zusammenfassung entsteht …\n{text[-1800:]}")
+                except discord.HTTPException:
+                    pass
+
+            # Zwischenstand der GPT-Zusammenfassung, höchstens alle 1,5 s ein Edit. Der Edit
+            # läuft nebenher, damit ein langsames Discord den geteilten Stream nicht aufhält.
+            def on_delta(text):
+                nonlocal last_edit, pending_edit
+                if time.monotonic() - last_edit >= 1.5 and (pending_edit is None or pending_edit.done()):
+                    last_edit = time.monotonic()
+                    pending_edit = spawn(edit_progress(text))
+
+            path = await generate_job_pdf(job, on_delta)
+            if pending_edit is not None:
+                await asyncio.gather(pending_edit, return_exceptions=True)
 
             if os.path.exists(path):
-                file = discord.File(path, filename=os.path.basename(path))
-                await interaction.followup.send("📄 Hier ist dein Jobexport:", file=file, ephemeral=True)
+                file = discord.File(path, filename=attachment_name(path))
+                await progress.edit(content="📄 Hier ist dein Jobexport:", attachments=[file])
             else:
                 await interaction.followup.send("❌ PDF konnte nicht erstellt werden.", ephemeral=True)
 
@@ -435,11 +2576,9 @@ class WorkTypeSelect(Select):
 
     async def callback(self, interaction: Interaction):
         selected = self.values[0]
-        config = load_config()
 
         # Lege bei "all" trotzdem leeren String in config ab
-        config["work_type"] = "" if selected == "all" else selected
-        save_config(config)
+        set_config(work_type="" if selected == "all" else selected)
 
         label = "Alle" if selected == "all" else selected.capitalize()
         await interaction.response.send_message(f"✅ Arbeitsmodell gespeichert: **{label}**", ephemeral=True)
@@ -453,170 +2592,558 @@ class WorkTypeView(View):
 
 
 
-class JobActionsView(View):
-    def __init__(self, job):
-        super().__init__(timeout=None)
+class SaveJobButton(Button):
+    def __init__(self, job, number):
+        super().__init__(label=f"💾 Save #{number}", style=discord.ButtonStyle.green)
         self.job = job
 
-    @discord.ui.button(label="💾 Save", style=discord.ButtonStyle.green)
-    async def save_button(self, interaction: discord.Interaction, button: Button):
+    async def callback(self, interaction: discord.Interaction):
         save_job(self.job)
         await interaction.response.send_message("✅ Job gespeichert!", ephemeral=True)
+        spawn(enrich_saved_job(self.job))
 
 
-
-def fetch_jobs_ihk(keywords, location):
-    jobs = []
-    headers = {"User-Agent": "Mozilla/5.0"}
-
+# Lädt die Stellenseite eines Favoriten vorab: der PDF-Export kommt dann aus dem
+# Cache, und eine gefundene Kontaktadresse schaltet "Bewerbung vorbereiten" frei
+async def enrich_saved_job(job):
     try:
-        for kw in keywords:
-            suchtext = urllib.parse.quote(kw)
-            ort = urllib.parse.quote(location)
-            url = f"https://www.ihk-lehrstellenboerse.de/suche?suchtext={suchtext}&umkreis=100&ort={ort}"
-
-            r = requests.get(url, headers=headers, timeout=10)
-            soup = BeautifulSoup(r.text, "html.parser")
-
-            for listing in soup.select(".resultList__item")[:3]:
-                title = listing.select_one(".resultList__title")
-                firm = listing.select_one(".resultList__firm")
-                loc = listing.select_one(".resultList__location")
-                href = title["href"] if title and title.has_attr("href") else "#"
-
-                jobs.append({
-                    "title": title.get_text(strip=True) if title else kw,
-                    "company": firm.get_text(strip=True) if firm else "IHK",
-                    "location": loc.get_text(strip=True) if loc else location,
-                    "url": f"https://www.ihk-lehrstellenboerse.de{href}",
-                    "source": "IHK-Lehrstellenbörse"
-                })
+        page = await fetch_job_page(job["url"])
     except Exception as e:
-        logger.error(f"IHK Scraping-Fehler: {e}")
-        send_error_to_webhook(f"IHK Scraping-Fehler: {e}")
-    return jobs
+        logger.debug(f"Stellenseite für Favorit nicht geladen: {e}")
+        return
+    if page["email"] and not job.get("email"):
+        update_saved_job({**job, "email": page["email"]})
 
 
+class JobBatchView(View):
+    def __init__(self, jobs):
+        super().__init__(timeout=None)
+        for number, job in enumerate(jobs, start=1):
+            self.add_item(SaveJobButton(job, number))
 
-def fetch_jobs_honeypot(keywords):
-    jobs = []
-    url = "https://www.honeypot.io/jobs"
-    headers = {"User-Agent": "Mozilla/5.0"}
 
-    try:
-        r = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(r.text, "html.parser")
-
-        found = 0
-        for listing in soup.select("a[href^='/job/']"):
-            title = listing.get_text(strip=True)
-            if any(kw.lower() in title.lower() for kw in keywords):
-                jobs.append({
-                    "title": title,
-                    "company": "Honeypot",
-                    "location": "Remote / EU",
-                    "url": f"https://www.honeypot.io{listing['href']}",
-                    "source": "Honeypot"
-                })
-                found += 1
-            if found >= 3:
-                break
-    except Exception as e:
-        logger.error(f"Honeypot Scraping-Fehler: {e}")
-        send_error_to_webhook(f"Honeypot Scraping-Fehler: {e}")
-    return jobs
 
+# -------- Job-Posting --------
+def build_job_embed(job, keywords, number):
+    embed = discord.Embed(
+        title=highlight_keywords(job["title"], keywords)[:256],
+        color=0x3498db,
+        url=job["url"]
+    )
+    embed.add_field(name="Unternehmen", value=job.get("company", "Unbekannt"), inline=True)
+    embed.add_field(name="Ort", value=job.get("location", "Unbekannt"), inline=True)
 
+    # Kununu-Rating
+    if job.get("company"):
+        kununu = cached_kununu_rating(normalize_company_name(job["company"]))
+        if kununu:
+            embed.add_field(name="Kununu", value=kununu, inline=False)
+    embed.set_footer(text=f"#{number} · {job.get('source', '')}")
+    return embed
 
 
-async def search_jobs(days: int = 10):
-    config = load_config()
-    keywords = config["keywords"]
-    seen_ids = load_seen_jobs()
-    all_jobs = []
+class JobPoster:
+    # Sammelt neue Jobs und sendet bis zu 10 Embeds pro Nachricht. Der
+    # Token-Bucket hält das Kanal-Limit von Discord ein, bevor es 429er gibt.
+    MAX_EMBEDS = 10
+    MAX_EMBED_CHARS = 6000
 
-    # -------- Adzuna --------
-    for kw in keywords:
-        url = f"https://api.adzuna.com/v1/api/jobs/{COUNTRY}/search/1"
+    def __init__(self):
+        self._queue = asyncio.Queue()
+        self._bucket = TokenBucket(DISCORD_POST_RATE / DISCORD_POST_PER, DISCORD_POST_RATE)
+        self._task = None
+
+    def submit(self, jobs, keywords):
+        for job in jobs:
+            self._queue.put_nowait((job, keywords))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.MAX_EMBEDS and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._send_batch(batch)
+            except Exception as e:
+                logger.error(f"Fehler beim Senden an Discord: {e}")
+                send_error_to_webhook(f"Fehler beim Senden an Discord: {e}")
+
+    async def _send_batch(self, batch):
+        await prefetch_kununu(normalize_company_name(job["company"]) for job, _ in batch if job.get("company"))
+        channel = bot.get_channel(CHANNEL_ID) or await bot.fetch_channel(CHANNEL_ID)
+
+        jobs, embeds, chars = [], [], 0
+        for job, keywords in batch:
+            embed = build_job_embed(job, keywords, len(embeds) + 1)
+            # Discord erlaubt max. 6000 Zeichen über alle Embeds einer Nachricht
+            if embeds and chars + len(embed) > self.MAX_EMBED_CHARS:
+                await self._send(channel, jobs, embeds)
+                jobs, embeds, chars = [], [], 0
+                embed = build_job_embed(job, keywords, 1)
+            jobs.append(job)
+            embeds.append(embed)
+            chars += len(embed)
+        if embeds:
+            await self._send(channel, jobs, embeds)
+
+    async def _send(self, channel, jobs, embeds):
+        await self._bucket.acquire()
+        with timed("discord_post_seconds"):
+            await channel.send(embeds=embeds, view=JobBatchView(jobs))
+
+
+job_poster = JobPoster()
+
+
+# -------- Jobquellen --------
+@dataclass(frozen=True)
+class JobQuery:
+    keywords: tuple
+    location: str
+    radius: int
+    days: int
+    work_type: str = ""
+    incremental: bool = False  # nur Neues seit dem letzten Lauf (Cursor je Quelle/Keyword/Ort)
+    since: str = None          # neuester bekannter created-Zeitstempel der Quelle
+
+
+def make_job(source, title, company, location, url, job_id=None, created=None, description=None):
+    # Einheitlicher Job-Datensatz; Quellen ohne eigene ID bekommen eine stabile ID aus der URL
+    if not job_id:
+        job_id = f"{source}-{hashlib.sha1(url.encode()).hexdigest()[:16]}"
+    job = {
+        "id": str(job_id),
+        "title": title or "Ohne Titel",
+        "company": company or "Unbekannt",
+        "location": location or "Unbekannt",
+        "url": url,
+        "source": source,
+    }
+    if created:
+        job["created"] = created
+    if description:
+        job["description"] = description
+    return job
+
+
+# -------- Such-Cursor --------
+# Je (Quelle, Keyword, Ort) merkt sich jobbot.db den neuesten created-Zeitstempel
+# und den letzten Abruf. Geplante Suchen fragen damit nur noch Neues ab.
+def _cursor_key(source: str, query: JobQuery):
+    return source, ",".join(sorted(kw.lower() for kw in query.keywords)), f"{query.location.lower()}|{query.radius}"
+
+def load_search_cursor(source: str, query: JobQuery):
+    db = get_db()
+    with _db_lock:
+        return db.execute(
+            "SELECT last_created, last_run, last_ids FROM search_cursors WHERE source = ? AND keyword = ? AND location = ?",
+            _cursor_key(source, query),
+        ).fetchone()
+
+def store_search_cursor(source: str, query: JobQuery, jobs):
+    newest = max((job["created"] for job in jobs if job.get("created")), default=None)
+    # Quellen ohne Datum: IDs des letzten Abrufs als Marke; leerer Abruf behält die alte
+    last_ids = json.dumps([job["id"] for job in jobs][:CURSOR_MAX_IDS]) if jobs else None
+    db = get_db()
+    with _db_lock, db:
+        # ISO-Zeitstempel gleichen Formats lassen sich als Text vergleichen
+        db.execute(
+            "INSERT INTO search_cursors (source, keyword, location, last_created, last_run, last_ids) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(source, keyword, location) DO UPDATE SET last_run = excluded.last_run, "
+            "last_created = NULLIF(MAX(COALESCE(last_created, ''), COALESCE(excluded.last_created, '')), ''), "
+            "last_ids = COALESCE(excluded.last_ids, last_ids)",
+            (*_cursor_key(source, query), newest, time.time(), last_ids),
+        )
+
+def parse_created(value: str):
+    try:
+        created = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return created if created.tzinfo else created.replace(tzinfo=timezone.utc)
+
+def days_since(value: str, default: int) -> int:
+    # Ganze Tage seit dem Cursor (mindestens 1), höchstens das übliche Suchfenster
+    created = parse_created(value)
+    if created is None:
+        return default
+    age = (datetime.now(timezone.utc) - created).total_seconds() + CURSOR_OVERLAP
+    return max(1, min(default, math.ceil(age / 86400)))
+
+def is_newer(job, since) -> bool:
+    created, cursor = parse_created(job.get("created")), parse_created(since)
+    return created is None or cursor is None or (cursor - created).total_seconds() <= CURSOR_OVERLAP
+
+def take_api_quota(api: str, wanted: int, daily_limit: int) -> int:
+    # Tageskontingent je API in meta (quota:<api>:<Datum>); liefert die bewilligte Anzahl Aufrufe
+    if daily_limit <= 0:
+        return wanted
+    day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    key = f"quota:{api}:{day}"
+    db = get_db()
+    with _db_lock, db:
+        row = db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        used = int(row["value"]) if row else 0
+        granted = max(0, min(wanted, daily_limit - used))
+        if granted:
+            db.execute("DELETE FROM meta WHERE key LIKE ? AND key != ?", (f"quota:{api}:%", key))
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(used + granted)))
+    return granted
+
+
+class JobSource:
+    name = ""
+    label = ""
+    per_keyword = True        # eine Abfrage je Keyword statt einer für alle
+    paginated = False         # Quelle liefert weitere Ergebnisseiten
+    date_filter = False       # Quelle filtert serverseitig nach Alter (days)
+    max_concurrency = HOST_CONCURRENCY
+    min_interval = SOURCE_MIN_INTERVAL  # inkrementell: Quellen ohne Datumsfilter seltener abfragen
+
+    def __init__(self):
+        self._limit = asyncio.Semaphore(self.max_concurrency)
+
+    def can_serve(self, query: JobQuery) -> bool:
+        return True
+
+    async def fetch(self, query: JobQuery) -> list:
+        raise NotImplementedError
+
+    async def run(self, query: JobQuery) -> list:
+        cursor = load_search_cursor(self.name, query) if query.incremental else None
+        if cursor and not self.date_filter and time.time() - cursor["last_run"] < self.min_interval:
+            inc("source_skipped_total", source=self.name)
+            return []
+        if cursor and self.date_filter and cursor["last_created"]:
+            query = replace(query, since=cursor["last_created"])
+
+        async with self._limit:
+            with timed("source_fetch_seconds", source=self.name):
+                jobs = await self.fetch(query)
+        # Nur nach erfolgreichem Abruf weiterschieben
+        store_search_cursor(self.name, query, jobs)
+        if cursor and not self.date_filter and cursor["last_ids"]:
+            # Schon beim letzten Abruf gelistete Anzeigen gar nicht erst weiterreichen
+            known = set(json.loads(cursor["last_ids"]))
+            fresh = [job for job in jobs if job["id"] not in known]
+            inc("source_cursor_skipped_total", len(jobs) - len(fresh), source=self.name)
+            jobs = fresh
+        inc("source_jobs_total", len(jobs), source=self.name)
+        return jobs
+
+
+JOB_SOURCES = {}
+
+def register_source(cls):
+    JOB_SOURCES[cls.name] = cls()
+    return cls
+
+
+# Parser laufen im "parse"-Prozesspool und liefern nur einfache Tupel zurück
+AGENTUR_EMPLOYER_RE = re.compile(r"arbeitgeber|firma|unternehmen|employer|company", re.I)
+AGENTUR_LOCATION_RE = re.compile(r"arbeitsort|\bort\b|standort|location", re.I)
+
+def _listing_field(item, pattern):
+    el = item.find(class_=pattern) if item else None
+    if el is None:
+        return None
+    return el.get_text(" ", strip=True) or None
+
+def parse_agentur_links(html):
+    soup = BeautifulSoup(html, HTML_PARSER)
+    listings = []
+    for a in soup.select("a.stellenangebot"):
+        # Arbeitgeber und Arbeitsort stehen im umgebenden Listeneintrag
+        item = a.find_parent(["li", "article", "tr"]) or a.parent
+        listings.append((a.text.strip(), _listing_field(item, AGENTUR_EMPLOYER_RE),
+                         _listing_field(item, AGENTUR_LOCATION_RE), a["href"]))
+    return listings
+
+def parse_honeypot_links(html):
+    soup = BeautifulSoup(html, HTML_PARSER)
+    return [(a.get_text(strip=True), a["href"]) for a in soup.select("a[href^='/job/']")]
+
+def parse_ihk_listings(html):
+    soup = BeautifulSoup(html, HTML_PARSER)
+    listings = []
+    for listing in soup.select(".resultList__item"):
+        title = listing.select_one(".resultList__title")
+        firm = listing.select_one(".resultList__firm")
+        loc = listing.select_one(".resultList__location")
+        href = title["href"] if title and title.has_attr("href") else "#"
+        listings.append((
+            title.get_text(strip=True) if title else None,
+            firm.get_text(strip=True) if firm else None,
+            loc.get_text(strip=True) if loc else None,
+            href,
+        ))
+    return listings
+
+
+@register_source
+class AdzunaSource(JobSource):
+    name = "adzuna"
+    label = "Adzuna"
+    paginated = True
+    date_filter = True
+
+    def can_serve(self, query):
+        return bool(APP_ID and APP_KEY)
+
+    async def fetch_results(self, query, page):
+        url = f"https://api.adzuna.com/v1/api/jobs/{COUNTRY}/search/{page}"
         params = {
             "app_id": APP_ID,
             "app_key": APP_KEY,
-            "results_per_page": 3,
-            "what": kw,
-            "where": config["location"],
-            "distance": config["radius"],
-            "max_days_old": days,
+            "results_per_page": ADZUNA_PAGE_SIZE,
+            "what": query.keywords[0],
+            "where": query.location,
+            "distance": query.radius,
+            # Mit Cursor nur die Tage seit dem neuesten bekannten Treffer, neueste zuerst
+            "max_days_old": days_since(query.since, query.days) if query.since else query.days,
+            "sort_by": "date",
         }
-        try:
-            r = requests.get(url, params=params, timeout=10)
-            data = r.json()
-            for job in data.get("results", []):
-                job_id = job.get("id")
-                if job_id in seen_ids:
-                    continue
-                job_obj = {
-                    "id": job_id,
-                    "title": job.get("title"),
-                    "company": job.get("company", {}).get("display_name"),
-                    "location": job.get("location", {}).get("display_name"),
-                    "url": job.get("redirect_url")
-                }
-                all_jobs.append(job_obj)
-                seen_ids.add(job_id)
-        except Exception as e:
-            logger.error(f"Adzuna Fehler: {e}")
-            send_error_to_webhook(f"Adzuna Fehler: {e}")
+        data = await fetch_json(url, params=params)
+        inc("adzuna_pages_total", source=self.name)
+        return data
+
+    @staticmethod
+    def exhausted(results, since) -> bool:
+        # Nach Datum sortiert: eine Seite ohne neue oder ungesehene Treffer beendet die Suche
+        if not results:
+            return True
+        if not any(is_newer(job, since) for job in results):
+            return True
+        return not filter_unseen(str(job.get("id")) for job in results if job.get("id"))
+
+    async def fetch(self, query):
+        if not take_api_quota(self.name, 1, ADZUNA_DAILY_QUOTA):
+            logger.warning("⚠️ Adzuna-Tageskontingent aufgebraucht – Suche übersprungen.")
+            return []
+        data = await self.fetch_results(query, 1)
+        results = list(data.get("results", []))
+        target = max(ADZUNA_TARGET_RESULTS, ADZUNA_PAGE_SIZE)
+        # count liefert die Gesamtzahl der Treffer, daraus ergibt sich die letzte sinnvolle Seite
+        last_page = min(math.ceil(target / ADZUNA_PAGE_SIZE), math.ceil(data.get("count", 0) / ADZUNA_PAGE_SIZE))
+        done = self.exhausted(results, query.since)
+
+        page = 2
+        while not done and page <= last_page:
+            wave = list(range(page, min(last_page, page + ADZUNA_PAGE_CONCURRENCY - 1) + 1))
+            wave = wave[:take_api_quota(self.name, len(wave), ADZUNA_DAILY_QUOTA)]
+            if not wave:
+                logger.warning("⚠️ Adzuna-Tageskontingent aufgebraucht – weitere Seiten übersprungen.")
+                break
+            pages = await asyncio.gather(*(self.fetch_results(query, p) for p in wave), return_exceptions=True)
+            # In Seitenreihenfolge auswerten; nach einem Fehler oder bekannter Seite abbrechen
+            for p, page_data in zip(wave, pages):
+                if isinstance(page_data, Exception):
+                    logger.warning(f"⚠️ Adzuna-Seite {p} fehlgeschlagen: {page_data!r}")
+                    done = True
+                    break
+                page_results = page_data.get("results", [])
+                results.extend(page_results)
+                if self.exhausted(page_results, query.since):
+                    done = True
+                    break
+            page = wave[-1] + 1
+
+        results = [job for job in results[:target] if is_newer(job, query.since)]
+        return [
+            make_job(
+                self.name,
+                job.get("title"),
+                job.get("company", {}).get("display_name"),
+                job.get("location", {}).get("display_name"),
+                job.get("redirect_url"),
+                job_id=job.get("id"),
+                created=job.get("created"),
+                description=job.get("description"),
+            )
+            for job in results
+        ]
+
+
+@register_source
+class AgenturSource(JobSource):
+    name = "agentur"
+    label = "Arbeitsagentur"
+    max_concurrency = 2
+
+    async def fetch(self, query):
+        q = urllib.parse.quote(query.keywords[0])
+        url = f"https://jobboerse.arbeitsagentur.de/vamJB/start?aa=1&ref=home&stellenart=1&was={q}&wo={query.location}"
+        html = await fetch_text(url)
+        links = await run_blocking("parse", parse_agentur_links, html)
+        return [
+            make_job(self.name, title, firm, loc, f"https://jobboerse.arbeitsagentur.de{href}")
+            for title, firm, loc, href in links[:3]
+        ]
 
-    # -------- Agentur --------
-    agentur_jobs = fetch_jobs_agentur(keywords, config["location"])
-    all_jobs.extend(agentur_jobs)
 
-    # -------- Honeypot & IHK --------
-    all_jobs += fetch_jobs_honeypot(keywords)
-    all_jobs += fetch_jobs_ihk(keywords, config["location"])
+@register_source
+class HoneypotSource(JobSource):
+    name = "honeypot"
+    label = "Honeypot"
+    per_keyword = False
+
+    def can_serve(self, query):
+        # Honeypot listet nur Remote-/EU-Stellen
+        return query.work_type != "onsite"
+
+    async def fetch(self, query):
+        html = await fetch_text("https://www.honeypot.io/jobs")
+        links = await run_blocking("parse", parse_honeypot_links, html)
+
+        jobs = []
+        for title, href in links:
+            if any(kw.lower() in title.lower() for kw in query.keywords):
+                jobs.append(make_job(self.name, title, "Honeypot", "Remote / EU",
+                                     f"https://www.honeypot.io{href}"))
+            if len(jobs) >= 3:
+                break
+        return jobs
+
+
+@register_source
+class IhkSource(JobSource):
+    name = "ihk"
+    label = "IHK"
+    max_concurrency = 2
+
+    async def fetch(self, query):
+        kw = query.keywords[0]
+        suchtext = urllib.parse.quote(kw)
+        ort = urllib.parse.quote(query.location)
+        url = f"https://www.ihk-lehrstellenboerse.de/suche?suchtext={suchtext}&umkreis=100&ort={ort}"
+
+        html = await fetch_text(url)
+        listings = await run_blocking("parse", parse_ihk_listings, html)
+
+        return [
+            make_job(
+                self.name,
+                title or kw,
+                firm,
+                loc,
+                f"https://www.ihk-lehrstellenboerse.de{href}",
+            )
+            for title, firm, loc, href in listings[:3]
+        ]
+
+
+# Baut die Abfragen aller aktiven Quellen, die die Suche bedienen können
+def source_fetches(query: JobQuery, enabled=None):
+    fetches = []
+    for source in JOB_SOURCES.values():
+        if enabled and source.name not in enabled:
+            continue
+        if not source.can_serve(query):
+            logger.info(f"Quelle {source.label} übersprungen.")
+            continue
+        if source.per_keyword:
+            for kw in query.keywords:
+                fetches.append((f"{source.label} ({kw})", source.run(replace(query, keywords=(kw,)))))
+        else:
+            fetches.append((source.label, source.run(query)))
+    return fetches
+
+
+# Startet alle (Quelle, Keyword)-Abfragen gleichzeitig. Nach SEARCH_DEADLINE
+# werden offene Abfragen abgebrochen, fertige Ergebnisse trotzdem verwendet.
+async def gather_jobs(fetches):
+    tasks = [(label, asyncio.create_task(coro)) for label, coro in fetches]
+    if not tasks:
+        return []
+    done, pending = await asyncio.wait([t for _, t in tasks], timeout=SEARCH_DEADLINE)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    jobs = []
+    timed_out = []
+    for label, task in tasks:
+        if task in pending:
+            timed_out.append(label)
+        elif isinstance(task.exception(), HostUnavailable):
+            # Offener Circuit wurde beim Öffnen einmal gemeldet
+            logger.info(f"{label} übersprungen: {task.exception()}")
+        elif task.exception():
+            logger.error(f"{label} Fehler: {task.exception()}")
+            send_error_to_webhook(f"{label} Fehler: {task.exception()}")
+        else:
+            jobs.extend(task.result())
+    if timed_out:
+        logger.warning(f"⏱️ Zeitlimit erreicht, {len(timed_out)} Abfragen abgebrochen: {', '.join(timed_out)}")
+        send_error_to_webhook(f"Zeitlimit der Jobsuche erreicht ({len(timed_out)} Abfragen abgebrochen)")
+    return jobs
+
+
+# Geplante Suchen laufen inkrementell; manuelle Suchen (/search_jobs_days)
+# fragen das volle Zeitfenster ab
+async def search_jobs(days: int = 10, incremental: bool = True):
+    config = get_config()
+    keywords = config.keywords
+    all_jobs = []
+
+    # -------- Alle Quellen parallel abfragen --------
+    query = JobQuery(
+        keywords=keywords,
+        location=config.location,
+        radius=config.radius,
+        days=days,
+        work_type=config.work_type,
+        incremental=incremental,
+    )
+    with timed("search_phase_seconds", phase="fetch"):
+        found = await gather_jobs(source_fetches(query, config.sources))
+    logger.info(f"🌐 HTTP-Pool: {http_pool_stats()}")
+
+    with timed("search_phase_seconds", phase="dedup"):
+        unseen = filter_unseen(job["id"] for job in found)
+        for job in found:
+            if job["id"] in unseen:
+                unseen.discard(job["id"])
+                all_jobs.append(job)
+
+        # Auch Dubletten als gesehen markieren, damit ihre IDs nicht erneut geprüft werden
+        mark_jobs_seen(all_jobs)
+        await add_page_descriptions(all_jobs)
+        all_jobs = drop_duplicate_postings(all_jobs)
 
     if not all_jobs:
         logger.info("Keine neuen Jobs gefunden.")
         return
 
-    save_seen_jobs(seen_ids)
-
     # -------- An Discord-Channel senden --------
-    try:
-        channel = await bot.fetch_channel(CHANNEL_ID)
-        for job in all_jobs:
-            # Embed vorbereiten
-            embed = discord.Embed(
-                title=highlight_keywords(job["title"], keywords),
-                color=0x3498db,
-                url=job["url"]
-            )
-            embed.add_field(name="Unternehmen", value=job.get("company", "Unbekannt"), inline=True)
-            embed.add_field(name="Ort", value=job.get("location", "Unbekannt"), inline=True)
+    job_poster.submit(all_jobs, keywords)
 
-            # Kununu-Rating
-            if job.get("company"):
-                company_clean = normalize_company_name(job["company"])
-                kununu = fetch_kununu_rating(company_clean)
-                if kununu:
-                    embed.add_field(name="Kununu", value=kununu, inline=False)
+    # -------- Optional: Zusammenfassungen vorbereiten --------
+    if config.presummarize:
+        spawn(presummarize_jobs(all_jobs))
 
-            await channel.send(embed=embed, view=JobActionsView(job))
+@tree.command(name="stats", description="Zeigt Latenzen und Event-Loop-Metriken")
+async def stats(interaction: discord.Interaction):
+    text = stats_summary()
+    await interaction.response.send_message(f"📈 **Bot-Metriken**\n```{text[:1900]}```", ephemeral=True)
 
 
-    except Exception as e:
-        logger.error(f"Fehler beim Senden an Discord: {e}")
-        send_error_to_webhook(f"Fehler beim Senden an Discord: {e}")
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    observe("command_seconds", (discord.utils.utcnow() - interaction.created_at).total_seconds(), command=command.name)
+
 
 @tree.command(name="favorites", description="Zeigt gespeicherte Jobs an")
 async def favorites(interaction: discord.Interaction):
-    jobs = load_saved_jobs()
+    jobs = load_saved_jobs(limit=10)  # Zeige max. 10 letzte
     if not jobs:
         await interaction.response.send_message("📭 Keine gespeicherten Jobs gefunden.", ephemeral=True)
         return
 
     # Jobs anzeigen
-    for job in jobs[-10:]:  # Zeige max. 10 letzte
+    for job in jobs:
         embed = discord.Embed(
             title=job["title"],
             description=f"🏢 {job.get('company', 'Unbekannt')}",
@@ -626,10 +3153,66 @@ async def favorites(interaction: discord.Interaction):
         embed.add_field(name="Link", value=job.get("url", "Kein Link"), inline=False)
 
         await interaction.channel.send(embed=embed, view=FavoriteActionsView(job))
+        if not job.get("email"):
+            spawn(enrich_saved_job(job))
 
     await interaction.response.send_message("✅ Favoriten angezeigt.", ephemeral=True)
 
 
+@tree.command(name="export_favorites", description="Exportiert alle Favoriten als ein PDF oder ZIP")
+@app_commands.describe(format="Ein gemeinsames PDF (Standard) oder ein ZIP mit Einzel-PDFs")
+@app_commands.choices(format=[
+    app_commands.Choice(name="Ein PDF", value="pdf"),
+    app_commands.Choice(name="ZIP mit Einzel-PDFs", value="zip"),
+])
+async def export_favorites(interaction: discord.Interaction, format: app_commands.Choice[str] = None):
+    fmt = format.value if format else "pdf"
+    jobs = load_saved_jobs()
+    if not jobs:
+        await interaction.response.send_message("📭 Keine gespeicherten Jobs gefunden.", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True)
+    progress = await interaction.followup.send(f"⏳ Export: 0/{len(jobs)} Jobs …", ephemeral=True, wait=True)
+    done = 0
+
+    def on_progress(count):
+        nonlocal done
+        done = count
+
+    # Fortschritt alle 2 s statt pro Job, sonst läuft man ins Discord-Rate-Limit
+    async def report_progress():
+        while True:
+            await asyncio.sleep(2)
+            try:
+                await progress.edit(content=f"⏳ Export: {done}/{len(jobs)} Jobs …")
+            except discord.HTTPException:
+                pass
+
+    reporter = asyncio.create_task(report_progress())
+    try:
+        with timed("favorites_export_seconds", format=fmt):
+            path = await build_favorites_export(jobs, fmt, on_progress)
+    except Exception as e:
+        logger.error(f"Favoriten-Export fehlgeschlagen: {e}")
+        path = None
+    finally:
+        reporter.cancel()
+
+    if not path or not os.path.exists(path):
+        await progress.edit(content="❌ Export konnte nicht erstellt werden.")
+        return
+
+    size_limit = interaction.guild.filesize_limit if interaction.guild else 10 * 1024 * 1024
+    if os.path.getsize(path) > size_limit:
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        await progress.edit(content=f"📦 Export ist mit {size_mb:.1f} MB zu groß für Discord, liegt unter `{path}`.")
+        return
+
+    file = discord.File(path, filename=attachment_name(path))
+    await progress.edit(content=f"📄 {len(jobs)} Favoriten exportiert:", attachments=[file])
+
+
 @tree.command(name="update_config", description="Aktualisiert Suchparameter für Jobs")
 @app_commands.describe(
     location="Ort der Jobsuche",
@@ -637,17 +3220,12 @@ async def favorites(interaction: discord.Interaction):
     keywords="Kommagetrennte Keywords (z. B. linux, vmware)"
 )
 async def update_config(interaction: discord.Interaction, location: str, radius: int, keywords: str):
-    config = load_config()
-    config["location"] = location
-    config["radius"] = radius
-    config["keywords"] = [kw.strip() for kw in keywords.split(",")]
-
-    save_config(config)
+    config = set_config(location=location, radius=radius, keywords=tuple(kw.strip() for kw in keywords.split(",")))
 
     response = f"✅ Konfiguration aktualisiert!\n\n" \
-               f"📍 Ort: `{location}`\n" \
-               f"📏 Radius: `{radius} km`\n" \
-               f"🔎 Keywords: `{', '.join(config['keywords'])}`"
+               f"📍 Ort: `{config.location}`\n" \
+               f"📏 Radius: `{config.radius} km`\n" \
+               f"🔎 Keywords: `{', '.join(config.keywords)}`"
 
     await interaction.response.send_message(response, ephemeral=True)
 
@@ -659,8 +3237,8 @@ async def clear_favorites(interaction: discord.Interaction):
 
 @tree.command(name="config", description="Zeigt aktuelle Konfiguration")
 async def zeige_config(interaction: discord.Interaction):
-    config = load_config()
-    text = f"🌍 Ort: {config['location']}\n📏 Radius: {config['radius']} km\n🔎 Keywords: {', '.join(config['keywords'])}\n⏰ Uhrzeit: {config['execution_time']}\nOrt: {config['work_type']}"
+    config = get_config()
+    text = f"🌍 Ort: {config.location}\n📏 Radius: {config.radius} km\n🔎 Keywords: {', '.join(config.keywords)}\n⏰ Uhrzeit: {config.execution_time}\nOrt: {config.work_type or 'alle'}"
     await interaction.response.defer(ephemeral=True)
     await interaction.followup.send(text)
 
@@ -673,16 +3251,8 @@ async def set_time(interaction: discord.Interaction, uhrzeit: str):
     await interaction.response.defer(ephemeral=True)
     try:
         datetime.strptime(uhrzeit, "%H:%M")
-        config = load_config()
-        config["execution_time"] = uhrzeit
-        with open(CONFIG_FILE, "w") as f:
-            json.dump(config, f, indent=2)
-
-        global daily_search_task
-        if daily_search_task:
-            daily_search_task.cancel()
-
-        daily_search_task = asyncio.create_task(schedule_daily_search())
+        # Der Scheduler bekommt die Änderung über subscribe_config mit
+        set_config(execution_time=uhrzeit)
 
         await interaction.followup.send(f"⏰ Neue Uhrzeit gesetzt: {uhrzeit} – tägliche Suche wurde neu eingeplant.", ephemeral=True)
     except ValueError:
@@ -692,10 +3262,9 @@ async def set_time(interaction: discord.Interaction, uhrzeit: str):
 async def send_testmail(interaction: discord.Interaction, email: str):
     await interaction.response.defer(ephemeral=True)
 
-    success = send_application_email(email, "Test-Job IT Support")
-
-    message = f"✅ Testmail gesendet an {email}" if success else "❌ Fehler beim Versand der Testmail."
-    await interaction.followup.send(message, ephemeral=True)
+    mail_id = enqueue_application_email(email, "Test-Job IT Support")
+    await interaction.followup.send(f"📨 Testmail an {email} eingereiht, Zustellung läuft …", ephemeral=True)
+    await report_delivery(interaction, mail_id, f"Testmail an {email}")
 
 
 @tree.command(name="search_jobs_days", description="Sucht Jobs der letzten x Tage", guild=discord.Object(id=1380610208602001448))
@@ -703,7 +3272,7 @@ async def send_testmail(interaction: discord.Interaction, email: str):
 async def search_jobs_days(interaction: discord.Interaction, tage: int):
     await interaction.response.defer(ephemeral=True)
     try:
-        await search_jobs(days=tage)
+        await search_jobs(days=tage, incremental=False)
         await interaction.followup.send(f"🔎 Jobsuche (letzte {tage} Tage) wurde gestartet.", ephemeral=True)
     except Exception as e:
         logger.error(f"Fehler bei /search_jobs_days: {e}")
@@ -723,7 +3292,7 @@ class JobDaysSelect(discord.ui.Select):
         tage = int(self.values[0])
         await interaction.response.defer(ephemeral=True)
         try:
-            await search_jobs(days=tage)
+            await search_jobs(days=tage, incremental=False)
             await interaction.followup.send(f"🔎 Jobsuche für die letzten {tage} Tage wurde gestartet.", ephemeral=True)
         except Exception as e:
             logger.error(f"Fehler bei Dropdown-Jobsuche: {e}")
@@ -766,15 +3335,47 @@ async def cleanup_old_messages():
         if deleted:
             logger.info(f"🧹 {deleted} alte Nachrichten gelöscht.")
             if ERROR_WEBHOOK_URL:
-                requests.post(ERROR_WEBHOOK_URL, json={"content": f"🧹 {deleted} alte Bot-Nachrichten im Channel gelöscht."})
+                await post_webhook(ERROR_WEBHOOK_URL, {"content": f"🧹 {deleted} alte Bot-Nachrichten im Channel gelöscht."})
     except Exception as e:
         logger.error(f"Fehler beim Aufräumen alter Nachrichten: {e}")
         send_error_to_webhook(f"Fehler beim Aufräumen alter Nachrichten: {e}")
 
+_started = False
+_commands_synced = False
+
 @bot.event
 async def on_ready():
+    global _started, _commands_synced
     logger.info(f"✅ Eingeloggt als {bot.user}")
-    await tree.sync()
+    # on_ready kommt nach jedem Gateway-Reconnect erneut. Die Hintergrund-Tasks starten
+    # nur einmal und vor allem, was fehlschlagen kann; Sync wird bis zum Erfolg wiederholt.
+    first_start = not _started
+    if first_start:
+        start_kununu_refresher()
+        start_outbox_worker()
+        error_reporter.start()
+        # Aufräumen, stündliche und tägliche Suche laufen über den Scheduler
+        scheduler.start()
+        spawn(config_watcher())
+        await start_instrumentation()
+        _started = True
+    else:
+        logger.info("🔁 Verbindung wiederhergestellt, Hintergrund-Tasks laufen bereits.")
+
+    if not _commands_synced:
+        try:
+            await tree.sync()
+            _commands_synced = True
+        except Exception as e:
+            logger.error(f"Slash-Commands konnten nicht synchronisiert werden: {e}")
+            send_error_to_webhook(f"Slash-Command-Sync fehlgeschlagen: {e}")
+
+    if not first_start:
+        return
+    try:
+        await run_blocking("net", application_attachments)  # Anhänge vorladen
+    except Exception as e:
+        logger.error(f"Bewerbungsanhänge konnten nicht vorgeladen werden: {e}")
 
     # ------------------- Bot-Startmeldung nur einmal -------------------
     if ERROR_WEBHOOK_URL:
@@ -786,7 +3387,7 @@ async def on_ready():
             hostname = platform.node()
             sysinfo = f"**Version:** {bot_version}\n**Zeit:** {timestamp}\n**System:** {hostname}\n**RAM:** {ram_used}/{ram_total} GB"
             msg = f"✅ JobBot gestartet als **{bot.user}**\n{sysinfo}"
-            requests.post(ERROR_WEBHOOK_URL, json={"content": msg})
+            await post_webhook(ERROR_WEBHOOK_URL, {"content": msg})
         except Exception as e:
             logger.error(f"Fehler beim erweiterten Healthcheck: {e}")
 
@@ -796,59 +3397,165 @@ async def on_ready():
     #        requests.post(ERROR_WEBHOOK_URL, json={"content": f"✅ JobBot gestartet und verbunden als **{bot.user}**"})
     #    except Exception as e:
     #        logger.error(f"Fehler beim Healthcheck-Webhook: {e}")
-    
-    await tree.sync()
-# Starte täglichen Bereinigungs-Task
-    async def cleanup_loop():
-        await bot.wait_until_ready()
-        while not bot.is_closed():
-            try:
-                await cleanup_old_messages()
-            except Exception as e:
-                logger.error(f"Fehler in cleanup_loop: {e}")
-                send_error_to_webhook(f"Fehler in cleanup_loop: {e}")
-            await asyncio.sleep(86400)  # 24h warten
-
-    bot.loop.create_task(cleanup_loop())
-    await cleanup_old_messages()
-# Starte wiederkehrende Jobsuche jede Stunde
-    async def hourly_job_loop():
+
+
+# -------- Scheduler --------
+# Ein Task für alle wiederkehrenden Jobs. Der letzte Start jedes Jobs steht in
+# scheduler_runs; ein Lauf wird dort vor dem Start "beansprucht", dadurch läuft
+# jeder fällige Termin höchstens einmal, auch über Neustarts hinweg.
+@dataclass
+class ScheduledJob:
+    name: str
+    func: object               # async-Funktion ohne Argumente
+    every: float = None        # Sekunden zwischen zwei Läufen ...
+    at: object = None          # ... oder Funktion, die die tägliche Uhrzeit "HH:MM" liefert
+    jitter: float = 0          # zufällige Verzögerung bis zu so vielen Sekunden
+    catch_up: float = 0        # während Downtime verpassten Tagestermin nachholen, wenn höchstens so lange her
+    group: str = None          # Jobs derselben Gruppe laufen nie gleichzeitig
+
+
+class Scheduler:
+    def __init__(self):
+        self.jobs = {}
+        self._running = {}
+        self._jitter = {}
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._started_at = time.time()
+
+    def add(self, job: ScheduledJob):
+        self.jobs[job.name] = job
+
+    def wake(self):
+        # Termine neu berechnen, z. B. nach geänderter Uhrzeit
+        self._wakeup.set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._started_at = time.time()
+            self._task = asyncio.create_task(self._loop())
+
+    def _last_run(self, name: str):
+        db = get_db()
+        with _db_lock:
+            row = db.execute("SELECT last_run FROM scheduler_runs WHERE job = ?", (name,)).fetchone()
+        return row["last_run"] if row else None
+
+    def _claim(self, name: str, slot: float, now: float) -> bool:
+        db = get_db()
+        with _db_lock, db:
+            cursor = db.execute(
+                "INSERT INTO scheduler_runs (job, last_run) VALUES (?, ?) "
+                "ON CONFLICT(job) DO UPDATE SET last_run = excluded.last_run WHERE scheduler_runs.last_run < ?",
+                (name, now, slot),
+            )
+        return cursor.rowcount > 0
+
+    def reschedule(self, name: str):
+        # Neue Uhrzeit: heute schon vergangene Termine gelten als erledigt,
+        # eine per /set_time auf 08:00 gelegte Suche läuft um 10 Uhr also erst morgen
+        now = time.time()
+        self._claim(name, now, now)
+        self.wake()
+
+    def _record(self, name: str, status: str, duration: float):
+        db = get_db()
+        with _db_lock, db:
+            db.execute("UPDATE scheduler_runs SET last_status = ?, last_duration = ? WHERE job = ?", (status, duration, name))
+
+    def _next_slot(self, job: ScheduledJob, now: float) -> float:
+        last_run = self._last_run(job.name)
+        if job.every:
+            # Überfällige Intervall-Jobs laufen einmal sofort, nicht für jede verpasste Runde
+            return now if last_run is None else last_run + job.every
+
+        hour, minute = map(int, job.at().split(":"))
+        today = datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0).timestamp()
+        recent = today if today <= now else today - 86400
+        if last_run is None:
+            # Ohne Vorgeschichte nichts nachholen, erst den nächsten Termin nehmen
+            self._claim(job.name, now, now)
+            return recent + 86400
+        # Termine seit dem Start laufen immer, verpasste davor nur innerhalb von catch_up
+        if last_run < recent and (recent >= self._started_at or now - recent <= job.catch_up):
+            return recent
+        return recent + 86400
+
+    def _due_time(self, job: ScheduledJob, slot: float) -> float:
+        if self._jitter.get(job.name, (None,))[0] != slot:
+            self._jitter[job.name] = (slot, random.uniform(0, job.jitter))
+        return slot + self._jitter[job.name][1]
+
+    def _busy(self, job: ScheduledJob) -> bool:
+        return any(
+            not task.done() and (name == job.name or (job.group and self.jobs[name].group == job.group))
+            for name, task in self._running.items()
+        )
+
+    async def _execute(self, job: ScheduledJob):
+        start = time.monotonic()
+        status = "ok"
+        try:
+            with timed("scheduler_job_seconds", job=job.name):
+                await job.func()
+        except Exception as e:
+            status = f"Fehler: {e}"
+            logger.error(f"Fehler im geplanten Job {job.name}: {e}")
+            send_error_to_webhook(f"Fehler im geplanten Job {job.name}: {e}")
+        finally:
+            self._record(job.name, status, time.monotonic() - start)
+            self.wake()
+
+    async def _loop(self):
         await bot.wait_until_ready()
-        while not bot.is_closed():
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            next_due = None
+            for job in self.jobs.values():
+                if job.name in self._running and not self._running[job.name].done():
+                    continue
+                slot = self._next_slot(job, now)
+                due = self._due_time(job, slot)
+                if due > now:
+                    next_due = due if next_due is None else min(next_due, due)
+                    continue
+                if not self._claim(job.name, slot, now):
+                    continue
+                if self._busy(job):
+                    # Gleiche Arbeit läuft schon (z. B. stündliche statt tägliche Suche)
+                    logger.info(f"⏭️ Geplanter Job {job.name} übersprungen, Gruppe {job.group} läuft bereits.")
+                    self._record(job.name, "übersprungen", 0.0)
+                    continue
+                logger.info(f"⏰ Starte geplanten Job {job.name}")
+                self._running[job.name] = spawn(self._execute(job))
+
+            # Höchstens 60 s am Stück schlafen, damit Uhrzeitsprünge auffallen
+            timeout = 60.0 if next_due is None else min(60.0, max(0.0, next_due - now))
             try:
-                await search_jobs()
-            except Exception as e:
-                logger.error(f"Fehler im stündlichen Job-Loop: {e}")
-                send_error_to_webhook(f"Fehler im Jobloop: {e}")
-            await asyncio.sleep(3600)  # 1 Stunde warten
-
-    bot.loop.create_task(hourly_job_loop())
-    
-    await schedule_daily_search()
-    
-async def schedule_daily_search():
-    await bot.wait_until_ready()
-    while not bot.is_closed():
-        try:
-            config = load_config()
-            target_time = datetime.strptime(config["execution_time"], "%H:%M").time()
-            now = datetime.now()
-            next_run = datetime.combine(now.date(), target_time)
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
 
-            if now.time() > target_time:
-                next_run += timedelta(days=1)
 
-            wait_seconds = (next_run - now).total_seconds()
-            await asyncio.sleep(wait_seconds)
-            await search_jobs()
-        except Exception as e:
-            logger.error(f"Fehler bei geplanter Suche: {e}")
-            send_error_to_webhook(f"Fehler bei geplanter Suche: {e}")
-        await asyncio.sleep(86400)
+scheduler = Scheduler()
+scheduler.add(ScheduledJob("cleanup", cleanup_old_messages, every=86400, jitter=300))
+scheduler.add(ScheduledJob("hourly_search", search_jobs, every=3600, jitter=120, group="search"))
+scheduler.add(ScheduledJob("daily_search", search_jobs, at=lambda: get_config().execution_time,
+                           jitter=60, catch_up=6 * 3600, group="search"))
+# /set_time und Änderungen an config.json planen die tägliche Suche sofort neu
+def _on_config_change(old, new):
+    if old.execution_time != new.execution_time:
+        scheduler.reschedule("daily_search")
+    else:
+        scheduler.wake()
+
+subscribe_config(_on_config_change)
 
 
 # -------- Bot starten --------
-bot.run(TOKEN)
+if __name__ == "__main__":
+    bot.run(TOKEN)
 
 
 